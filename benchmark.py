@@ -8,28 +8,45 @@ to validate O(n) time complexity and sub-2-second execution for 50k partners.
 
 import time
 import json
-import random
 import tempfile
 import os
 import gc
-from typing import List, Dict
+import tracemalloc
+from typing import List, Dict, Optional
+import numpy as np
 import psutil
 import platform
 
+import commission_kernels
 from commission_engine import CommissionEngine
+from config import Constants
 
 
 class BenchmarkRunner:
     """Performance benchmark runner for the commission engine."""
     
-    def __init__(self):
-        """Initialize benchmark runner."""
+    def __init__(self, seed: int = Constants.BENCHMARK_SEED):
+        """
+        Initialize benchmark runner and warm up the compiled kernels.
+        
+        Args:
+            seed: Seed for the random generator, for reproducible results
+        """
         self.results: List[Dict] = []
+        self.rng = np.random.default_rng(seed)
+        self.system_info: Optional[Dict] = None
+        
+        # Compile the kernels up front so JIT time stays out of the timings
+        commission_kernels.warm_up()
         
-    def generate_test_data(self, num_partners: int, max_depth: int = 10) -> List[Dict]:
+    def generate_test_data(self, num_partners: int, 
+                           max_depth: int = Constants.DEFAULT_BENCHMARK_MAX_DEPTH) -> List[Dict]:
         """
         Generate test data with specified number of partners and maximum depth.
         
+        Revenues and parent IDs are drawn per level in single vectorized
+        NumPy RNG calls, so data generation doesn't mask engine performance.
+        
         Args:
             num_partners: Number of partners to generate
             max_depth: Maximum depth of the hierarchy
@@ -37,7 +54,7 @@ class BenchmarkRunner:
         Returns:
             List of partner dictionaries
         """
-        data = []
+        rng = self.rng
         partners_per_level = [1]  # Root level
         
         # Calculate partners per level to achieve desired distribution
@@ -46,7 +63,7 @@ class BenchmarkRunner:
         
         while remaining > 0 and level < max_depth:
             # Exponential growth with some randomness
-            level_size = min(remaining, int(partners_per_level[-1] * (2 + random.random())))
+            level_size = min(remaining, int(partners_per_level[-1] * (2 + rng.random())))
             partners_per_level.append(level_size)
             remaining -= level_size
             level += 1
@@ -55,35 +72,34 @@ class BenchmarkRunner:
         if remaining > 0:
             partners_per_level[-1] += remaining
         
-        # Generate the data
-        partner_id = 1
+        total = sum(partners_per_level)
+        num_roots = partners_per_level[0]
+        revenues = rng.integers(1000, 10001, size=total)
+        parent_ids = np.zeros(total, dtype=np.int64)
         
-        # Root partners
-        for _ in range(partners_per_level[0]):
-            data.append({
-                "id": partner_id,
-                "parent_id": None,
-                "name": f"Partner{partner_id}",
-                "monthly_revenue": random.randint(1000, 10000)
-            })
-            partner_id += 1
-        
-        # Generate subsequent levels
+        # Draw parents for each level from the previous level's ID range
+        offset = num_roots
         for level in range(1, len(partners_per_level)):
             parent_start = sum(partners_per_level[:level-1]) + 1 if level > 1 else 1
             parent_end = sum(partners_per_level[:level]) + 1
+            level_size = partners_per_level[level]
             
-            for _ in range(partners_per_level[level]):
-                parent_id = random.randint(parent_start, parent_end - 1)
-                data.append({
-                    "id": partner_id,
-                    "parent_id": parent_id,
-                    "name": f"Partner{partner_id}",
-                    "monthly_revenue": random.randint(1000, 10000)
-                })
-                partner_id += 1
-        
-        return data
+            parent_ids[offset:offset + level_size] = rng.integers(
+                parent_start, parent_end, size=level_size
+            )
+            offset += level_size
+        
+        return [
+            {
+                "id": partner_id,
+                "parent_id": parent_id if partner_id > num_roots else None,
+                "name": f"Partner{partner_id}",
+                "monthly_revenue": revenue
+            }
+            for partner_id, parent_id, revenue in zip(
+                range(1, total + 1), parent_ids.tolist(), revenues.tolist()
+            )
+        ]
     
     def run_benchmark(self, num_partners: int, description: str) -> Dict:
         """
@@ -99,39 +115,35 @@ class BenchmarkRunner:
         print(f"Running benchmark: {description} ({num_partners:,} partners)")
         
         # Generate test data
-        data_gen_start = time.time()
+        data_gen_start = time.perf_counter_ns()
         data = self.generate_test_data(num_partners)
-        data_gen_time = time.time() - data_gen_start
-        
-        # Get memory before test
-        process = psutil.Process()
-        memory_before = process.memory_info().rss / 1024 / 1024  # MB
+        data_gen_time = (time.perf_counter_ns() - data_gen_start) / 1e9
         
         # Run commission calculation
         gc.collect()  # Clean up before measurement
         
-        calc_start = time.time()
+        # Monotonic integer-nanosecond clock; converted to seconds only when stored
+        calc_start = time.perf_counter_ns()
         engine = CommissionEngine()
         
         # Load and process
-        load_start = time.time()
+        load_start = time.perf_counter_ns()
         engine.load_partners(data)
-        load_time = time.time() - load_start
+        load_time = (time.perf_counter_ns() - load_start) / 1e9
         
-        daily_start = time.time()
+        daily_start = time.perf_counter_ns()
         engine.calculate_daily_profits()
-        daily_time = time.time() - daily_start
+        daily_time = (time.perf_counter_ns() - daily_start) / 1e9
         
-        commission_start = time.time()
+        commission_start = time.perf_counter_ns()
         commissions = engine.calculate_commissions()
-        commission_time = time.time() - commission_start
+        commission_time = (time.perf_counter_ns() - commission_start) / 1e9
         
-        calc_end = time.time()
-        total_calc_time = calc_end - calc_start
+        calc_end = time.perf_counter_ns()
+        total_calc_time = (calc_end - calc_start) / 1e9
         
-        # Get memory after test
-        memory_after = process.memory_info().rss / 1024 / 1024  # MB
-        memory_used = memory_after - memory_before
+        # Measure memory in a separate run so tracing doesn't skew timings
+        memory_used = self.measure_peak_memory(data)
         
         # Get network statistics
         stats = engine.get_stats()
@@ -153,13 +165,53 @@ class BenchmarkRunner:
         # Print results
         print(f"  ✓ Total calculation time: {total_calc_time:.3f}s")
         print(f"  ✓ Partners per second: {result['partners_per_second']:,.0f}")
-        print(f"  ✓ Memory used: {memory_used:.1f} MB")
+        print(f"  ✓ Peak memory: {memory_used:.1f} MB")
         print(f"  ✓ Max depth: {stats['max_depth']}")
         print()
         
         self.results.append(result)
         return result
     
+    def measure_peak_memory(self, data: List[Dict]) -> float:
+        """
+        Measure peak memory allocated by a full calculation on the data.
+        
+        Uses tracemalloc, which counts Python and NumPy allocations without
+        per-sample syscalls. Tracing slows allocation, so callers should run
+        this outside of timed sections.
+        
+        Args:
+            data: Partner data to process
+            
+        Returns:
+            Peak traced memory in MB
+        """
+        gc.collect()
+        tracemalloc.start()
+        try:
+            engine = CommissionEngine()
+            engine.load_partners(data)
+            engine.calculate_daily_profits()
+            engine.calculate_commissions()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        
+        return peak / 1024 / 1024
+    
+    def get_system_info(self) -> Dict:
+        """Collect system information once per benchmark suite."""
+        if self.system_info is None:
+            self.system_info = {
+                'system': platform.system(),
+                'release': platform.release(),
+                'processor': platform.processor(),
+                'python_version': platform.python_version(),
+                'cpu_cores': psutil.cpu_count(),
+                'total_ram_gb': psutil.virtual_memory().total / 1024**3
+            }
+        return self.system_info
+    
     def run_all_benchmarks(self):
         """Run comprehensive benchmark suite."""
         print("=" * 60)
@@ -167,11 +219,12 @@ class BenchmarkRunner:
         print("=" * 60)
         
         # System information
-        print(f"System: {platform.system()} {platform.release()}")
-        print(f"Processor: {platform.processor()}")
-        print(f"Python: {platform.python_version()}")
-        print(f"CPU cores: {psutil.cpu_count()}")
-        print(f"Available RAM: {psutil.virtual_memory().total / 1024**3:.1f} GB")
+        system_info = self.get_system_info()
+        print(f"System: {system_info['system']} {system_info['release']}")
+        print(f"Processor: {system_info['processor']}")
+        print(f"Python: {system_info['python_version']}")
+        print(f"CPU cores: {system_info['cpu_cores']}")
+        print(f"Available RAM: {system_info['total_ram_gb']:.1f} GB")
         print()
         
         # Benchmark scenarios
@@ -206,14 +259,7 @@ class BenchmarkRunner:
         """Save benchmark results to JSON file."""
         with open(filename, 'w') as f:
             json.dump({
-                'system_info': {
-                    'system': platform.system(),
-                    'release': platform.release(),
-                    'processor': platform.processor(),
-                    'python_version': platform.python_version(),
-                    'cpu_cores': psutil.cpu_count(),
-                    'total_ram_gb': psutil.virtual_memory().total / 1024**3
-                },
+                'system_info': self.get_system_info(),
                 'results': self.results,
                 'timestamp': time.time()
             }, f, indent=2)
@@ -289,13 +335,13 @@ def test_file_processing_benchmark():
         output_file = f.name
     
     try:
-        start_time = time.time()
+        start_time = time.perf_counter_ns()
         engine = CommissionEngine()
         engine.process_file(input_file, output_file)
-        end_time = time.time()
+        end_time = time.perf_counter_ns()
         
         file_size_mb = os.path.getsize(input_file) / 1024 / 1024
-        processing_time = end_time - start_time
+        processing_time = (end_time - start_time) / 1e9
         
         print(f"  ✓ File I/O test: {processing_time:.3f}s for {file_size_mb:.1f} MB file")
         
@@ -306,8 +352,6 @@ def test_file_processing_benchmark():
 
 def main():
     """Main benchmark execution."""
-    random.seed(42)  # For reproducible results
-    
     runner = BenchmarkRunner()
     runner.run_all_benchmarks()
     runner.print_summary()
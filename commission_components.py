@@ -2,18 +2,44 @@
 Commission calculation and statistics components.
 """
 
-from typing import Dict
-from tree_components import PartnerTree, Partner
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+import commission_kernels
+from tree_components import PartnerTree
 from config import Constants
 from utils import MathUtils
 
 
 class CommissionCalculator:
-    """Calculates commissions using post-order DFS traversal."""
+    """Calculates commissions with a reverse-topological scan over tree arrays."""
+    
+    def __init__(self):
+        """Initialize calculator."""
+        self._subtree_buf: Optional[np.ndarray] = None
+    
+    def _subtree_scratch(self, size: int) -> np.ndarray:
+        """
+        Get a zeroed subtree scratch buffer of the given length.
+        
+        The buffer is pooled on the calculator and only reallocated when a
+        larger tree is seen, so repeated daily runs skip the allocation.
+        """
+        if self._subtree_buf is None or self._subtree_buf.size < size:
+            self._subtree_buf = np.empty(size, dtype=np.float64)
+        buf = self._subtree_buf[:size]
+        buf.fill(0.0)
+        return buf
     
     def calculate_commissions(self, tree: PartnerTree) -> Dict[str, float]:
         """
-        Calculate commissions for all partners using post-order DFS.
+        Calculate commissions for all partners.
+        
+        Walking ``tree.order`` backwards visits every partner after all of its
+        descendants, so each subtree profit is complete before it is pushed
+        to the parent. This replaces per-partner object traversal with a
+        single pass over flat arrays.
         
         Args:
             tree: PartnerTree to process
@@ -22,60 +48,74 @@ class CommissionCalculator:
             Dictionary mapping partner IDs to their total commissions
             
         Time Complexity: O(n) where n is the number of partners
-        Space Complexity: O(h) where h is the height of the tree
+        Space Complexity: O(n) for the subtree profit scratch array, reused across calls
         """
-        # Reset commission calculations
-        self._reset_commissions(tree)
+        tree.ensure_arrays()
         
-        # Calculate commissions using post-order traversal
-        for root in tree.get_roots():
-            self._calculate_subtree_commission(root)
+        # Commission is 5% of descendants' profits, accumulated in reverse topological order.
+        # The kernel returns a freshly populated array, so no reset pass is needed.
+        tree.total_commission = commission_kernels.commission_scan(
+            tree.order, tree.parent_idx, tree.daily_profit, Constants.COMMISSION_RATE,
+            tree.root_offsets, self._subtree_scratch(tree.daily_profit.size)
+        )
         
         # Format output with 2 decimal precision
         return self._format_results(tree)
     
-    def _reset_commissions(self, tree: PartnerTree) -> None:
-        """Reset all commission values to zero."""
-        for partner in tree.get_all_partners():
-            partner.total_commission = 0.0
-    
-    def _calculate_subtree_commission(self, partner: Partner) -> float:
+    def calculate_fused(self, tree: PartnerTree, days_in_month: int) -> Dict[str, float]:
         """
-        Calculate total commission for a partner's subtree using post-order DFS.
+        Calculate daily profits and commissions in a single pass.
+        
+        Equivalent to running DailyProfitCalculator followed by
+        ``calculate_commissions``, but the fused kernel derives each daily
+        profit right before accumulating it, halving memory traffic.
         
         Args:
-            partner: Root of the subtree
+            tree: PartnerTree to process
+            days_in_month: Number of days to spread monthly revenue over
             
         Returns:
-            Total profit from this subtree (for commission calculation)
+            Dictionary mapping partner IDs to their total commissions
         """
-        # Calculate subtree profit (profit from all descendants)
-        subtree_profit = 0.0
-        
-        # First, recursively process all children (post-order)
-        for child in partner.children:
-            child_subtree_profit = self._calculate_subtree_commission(child)
-            subtree_profit += child_subtree_profit
-        
-        # Add this partner's own profit to subtree total
-        subtree_profit += partner.daily_profit
+        _, rounded = self.calculate_fused_arrays(tree, days_in_month)
+        return dict(zip(tree.id_strs, rounded.tolist()))
+    
+    def calculate_fused_arrays(self, tree: PartnerTree,
+                               days_in_month: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Run the fused calculation and return results as parallel arrays.
         
-        # Calculate commission for this partner (5% of descendants' profits only)
-        descendants_profit = subtree_profit - partner.daily_profit
-        partner.total_commission = descendants_profit * Constants.COMMISSION_RATE
+        Skips building the ID -> commission dictionary, for callers such as
+        file export that can consume the arrays directly.
         
-        return subtree_profit
+        Args:
+            tree: PartnerTree to process
+            days_in_month: Number of days to spread monthly revenue over
+            
+        Returns:
+            Tuple of (partner IDs, commissions rounded to 2 decimals)
+        """
+        tree.ensure_arrays()
+        tree.total_commission = commission_kernels.commission_pipeline(
+            tree.order, tree.parent_idx, tree.monthly_revenue, days_in_month,
+            Constants.COMMISSION_RATE, tree.daily_profit, tree.root_offsets,
+            self._subtree_scratch(tree.daily_profit.size)
+        )
+        return tree.ids, MathUtils.round_currency_array(tree.total_commission)
     
     def _format_results(self, tree: PartnerTree) -> Dict[str, float]:
         """Format commission results with proper precision."""
-        return {
-            str(partner.id): MathUtils.round_currency(partner.total_commission)
-            for partner in tree.get_all_partners()
-        }
+        rounded = MathUtils.round_currency_array(tree.total_commission)
+        return dict(zip(tree.id_strs, rounded.tolist()))
 
 
 class TreeStatistics:
-    """Calculates various statistics about the partner tree."""
+    """
+    Calculates various statistics about the partner tree.
+    
+    Results are memoized on the tree, which is immutable once built, so
+    repeated queries (e.g. performance metrics) don't rescan it.
+    """
     
     def get_stats(self, tree: PartnerTree) -> Dict[str, int]:
         """
@@ -87,43 +127,20 @@ class TreeStatistics:
         Returns:
             Dictionary with network statistics
         """
-        return {
-            'total_partners': tree.size(),
-            'root_partners': len(tree.get_roots()),
-            'leaf_partners': len(tree.get_leaves()),
-            'max_depth': self._calculate_max_depth(tree)
-        }
+        tree.ensure_arrays()
+        if tree._stats_cache is None:
+            tree._stats_cache = {
+                'total_partners': tree.size(),
+                'root_partners': len(tree.get_roots()),
+                'leaf_partners': int(np.count_nonzero(np.diff(tree.child_offsets) == 0)),
+                'max_depth': self._calculate_max_depth(tree)
+            }
+        return dict(tree._stats_cache)
     
     def _calculate_max_depth(self, tree: PartnerTree) -> int:
         """Calculate maximum depth of the tree."""
-        max_depth = 0
-        
-        for root in tree.get_roots():
-            root_depth = self._calculate_depth_from_node(root)
-            max_depth = max(max_depth, root_depth)
-        
-        return max_depth
-    
-    def _calculate_depth_from_node(self, partner: Partner, current_depth: int = 0) -> int:
-        """
-        Calculate depth starting from a specific node.
-        
-        Args:
-            partner: Starting partner node
-            current_depth: Current depth level
-            
-        Returns:
-            Maximum depth from this node
-        """
-        if partner.is_leaf():
-            return current_depth
-        
-        max_child_depth = current_depth
-        for child in partner.children:
-            child_depth = self._calculate_depth_from_node(child, current_depth + 1)
-            max_child_depth = max(max_child_depth, child_depth)
-        
-        return max_child_depth
+        depths = tree.get_depths()
+        return int(depths.max()) if depths.size else 0
     
     def get_level_distribution(self, tree: PartnerTree) -> Dict[int, int]:
         """
@@ -135,17 +152,7 @@ class TreeStatistics:
         Returns:
             Dictionary mapping level to partner count
         """
-        level_counts = {}
-        
-        for root in tree.get_roots():
-            self._count_partners_by_level(root, 0, level_counts)
-        
-        return level_counts
-    
-    def _count_partners_by_level(self, partner: Partner, level: int, 
-                                level_counts: Dict[int, int]) -> None:
-        """Recursively count partners at each level."""
-        level_counts[level] = level_counts.get(level, 0) + 1
-        
-        for child in partner.children:
-            self._count_partners_by_level(child, level + 1, level_counts)
+        tree.ensure_arrays()
+        if tree._level_dist_cache is None:
+            tree._level_dist_cache = dict(enumerate(np.bincount(tree.get_depths()).tolist()))
+        return dict(tree._level_dist_cache)
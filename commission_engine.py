@@ -11,15 +11,17 @@ components.
 """
 
 from types import TracebackType
-from typing import Dict, List, Optional, Type
+from typing import Dict, List, Optional, Tuple, Type
 from datetime import datetime
 import logging
 
+import numpy as np
+
 from tree_components import (
     Partner, PartnerTree, TreeBuilder, TreeValidator, DailyProfitCalculator
 )
 from commission_components import CommissionCalculator, TreeStatistics
-from utils import FileUtils, ValidationUtils
+from utils import FileUtils
 from config import ErrorMessages
 
 # Set up module logger
@@ -67,30 +69,78 @@ class CommissionEngine:
             TypeError: If input data is not in expected format
         """
         try:
-            logger.info(f"Loading {len(data)} partners")
-            
-            # Validate input
-            if not isinstance(data, list):
-                raise TypeError(f"Expected list, got {type(data).__name__}")
-            
-            if not data:
-                raise ValueError("Partner data cannot be empty")
-            
-            # Validate data structure
-            ValidationUtils.validate_partner_data(data)
-            
-            # Build tree from data
-            self.tree = self.tree_builder.build_from_data(data)
-            
-            # Validate tree structure
-            self.tree_validator.validate(self.tree)
+            self._build_tree(data)
+        except Exception as e:
+            logger.error("Failed to load partners: %s", e)
+            self.tree = None  # Reset state on error
+            raise
+    
+    def _build_tree(self, data: List[Dict]) -> None:
+        """Validate input data and build the tree, without error logging."""
+        logger.info("Loading %d partners", len(data))
+        
+        # Validate input
+        if not isinstance(data, list):
+            raise TypeError(ErrorMessages.invalid_input_type(
+                expected_type="list", actual_type=type(data).__name__
+            ))
+        
+        if not data:
+            raise ValueError(ErrorMessages.EMPTY_PARTNER_DATA)
+        
+        # Build tree from data; the builder validates each record, and
+        # cycle checks fall out of building the traversal order
+        self.tree = self.tree_builder.build_from_data(data)
+        
+        # Validate tree structure
+        self.tree_validator.validate(self.tree)
+        
+        logger.info("Successfully loaded %d partners", self.tree.size())
+    
+    def load_partners_file(self, input_file: str) -> int:
+        """
+        Read partners from a JSON file and build the tree structure.
+        
+        A fast parser may read IDs beyond 64 bits as floats, which validation
+        rejects. Only then is the file re-read with exact integers, so valid
+        input never pays for a second parse.
+        
+        Args:
+            input_file: Path to input JSON file containing partner data
             
-            logger.info(f"Successfully loaded {self.tree.size()} partners")
+        Returns:
+            Number of partner records in the file
             
+        Raises:
+            FileNotFoundError: If input file doesn't exist
+            json.JSONDecodeError: If input file contains invalid JSON
+            ValueError: If cycles are detected or invalid structure found
+            TypeError: If input data is not in expected format
+        """
+        data = FileUtils.read_json(input_file)
+        try:
+            try:
+                self._build_tree(data)
+            except ValueError:
+                if not self._has_float_ids(data):
+                    raise
+                logger.info("Re-reading %s with exact integer IDs", input_file)
+                data = FileUtils.read_json(input_file, exact_integers=True)
+                self._build_tree(data)
         except Exception as e:
-            logger.error(f"Failed to load partners: {e}")
+            # Only the final outcome is logged, not the attempt that was retried
+            logger.error("Failed to load partners: %s", e)
             self.tree = None  # Reset state on error
             raise
+        return len(data)
+    
+    @staticmethod
+    def _has_float_ids(data: List[Dict]) -> bool:
+        """Check whether any record holds a float partner or parent ID."""
+        return any(
+            isinstance(item.get('id'), float) or isinstance(item.get('parent_id'), float)
+            for item in data if isinstance(item, dict)
+        )
     
     def calculate_daily_profits(self, target_date: Optional[datetime] = None) -> None:
         """
@@ -107,17 +157,17 @@ class CommissionEngine:
             self._ensure_tree_loaded()
             assert self.tree is not None  # Type hint for mypy
             
-            logger.debug(f"Calculating daily profits for date: {target_date}")
+            logger.debug("Calculating daily profits for date: %s", target_date)
             self.daily_profit_calculator.calculate_daily_profits(self.tree, target_date)
             logger.debug("Daily profits calculated successfully")
             
         except Exception as e:
-            logger.error(f"Failed to calculate daily profits: {e}")
+            logger.error("Failed to calculate daily profits: %s", e)
             raise
     
     def calculate_commissions(self) -> Dict[str, float]:
         """
-        Calculate commissions for all partners using post-order DFS.
+        Calculate commissions for all partners using a reverse-topological scan.
         
         Returns:
             Dictionary mapping partner IDs to their total commissions
@@ -126,7 +176,7 @@ class CommissionEngine:
             RuntimeError: If no partners are loaded
             
         Time Complexity: O(n) where n is the number of partners
-        Space Complexity: O(h) where h is the height of the tree
+        Space Complexity: O(n) for the subtree profit scratch array
         """
         try:
             self._ensure_tree_loaded()
@@ -134,11 +184,73 @@ class CommissionEngine:
             
             logger.debug("Starting commission calculation")
             result = self.commission_calculator.calculate_commissions(self.tree)
-            logger.info(f"Commission calculation completed for {len(result)} partners")
+            logger.info("Commission calculation completed for %d partners", len(result))
+            return result
+            
+        except Exception as e:
+            logger.error("Failed to calculate commissions: %s", e)
+            raise
+    
+    def calculate(self, target_date: Optional[datetime] = None) -> Dict[str, float]:
+        """
+        Calculate daily profits and commissions in one fused pass.
+        
+        Produces the same result as ``calculate_daily_profits`` followed by
+        ``calculate_commissions`` while walking the partner arrays only once.
+        
+        Args:
+            target_date: Date for which to calculate profits (defaults to current date)
+            
+        Returns:
+            Dictionary mapping partner IDs to their total commissions
+            
+        Raises:
+            RuntimeError: If no partners are loaded
+            ValueError: If target_date is invalid
+        """
+        try:
+            self._ensure_tree_loaded()
+            assert self.tree is not None  # Type hint for mypy
+            
+            days_in_month = self.daily_profit_calculator.resolve_days_in_month(target_date)
+            result = self.commission_calculator.calculate_fused(self.tree, days_in_month)
+            logger.info("Commission calculation completed for %d partners", len(result))
             return result
             
         except Exception as e:
-            logger.error(f"Failed to calculate commissions: {e}")
+            logger.error("Failed to calculate commissions: %s", e)
+            raise
+    
+    def calculate_arrays(self, target_date: Optional[datetime] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Run the fused calculation and return results as parallel arrays.
+        
+        Like ``calculate`` but skips materializing the result dictionary,
+        which lets exports serialize straight from the arrays.
+        
+        Args:
+            target_date: Date for which to calculate profits (defaults to current date)
+            
+        Returns:
+            Tuple of (partner IDs, commissions rounded to 2 decimals)
+            
+        Raises:
+            RuntimeError: If no partners are loaded
+            ValueError: If target_date is invalid
+        """
+        try:
+            self._ensure_tree_loaded()
+            assert self.tree is not None  # Type hint for mypy
+            
+            days_in_month = self.daily_profit_calculator.resolve_days_in_month(target_date)
+            ids, commissions = self.commission_calculator.calculate_fused_arrays(
+                self.tree, days_in_month
+            )
+            logger.info("Commission calculation completed for %d partners", ids.size)
+            return ids, commissions
+            
+        except Exception as e:
+            logger.error("Failed to calculate commissions: %s", e)
             raise
     
     def get_stats(self) -> Dict[str, int]:
@@ -176,9 +288,8 @@ class CommissionEngine:
         This is a convenience method that handles the complete workflow:
         1. Load data from input JSON file
         2. Build partner tree and validate structure
-        3. Calculate daily profits from monthly revenue
-        4. Calculate commissions using post-order DFS
-        5. Save results to output JSON file
+        3. Calculate daily profits and commissions in a single fused pass
+        4. Save results to output JSON file
         
         Args:
             input_file: Path to input JSON file containing partner data.
@@ -201,26 +312,23 @@ class CommissionEngine:
             IOError: If output file cannot be written
         """
         try:
-            logger.info(f"Processing commission calculation: {input_file} -> {output_file}")
-            
-            # Load input data
-            data = FileUtils.read_json(input_file)
+            logger.info("Processing commission calculation: %s -> %s", input_file, output_file)
             
-            # Process data
-            self.load_partners(data)
-            self.calculate_daily_profits()
-            commissions = self.calculate_commissions()
+            # Load input data; the parsed dictionaries are released once the
+            # tree is built
+            self.load_partners_file(input_file)
+            ids, commissions = self.calculate_arrays()
             
-            # Save results
-            FileUtils.write_json(output_file, commissions)
+            # Save results straight from the arrays
+            FileUtils.write_json_arrays(output_file, ids, commissions)
             
-            logger.info(f"Commission calculation completed successfully")
+            logger.info("Commission calculation completed successfully")
             
         except FileNotFoundError as e:
-            logger.error(f"Input file not found: {input_file}")
+            logger.error("Input file not found: %s", input_file)
             raise
         except Exception as e:
-            logger.error(f"Processing failed: {e}")
+            logger.error("Processing failed: %s", e)
             raise
     
     def get_performance_metrics(self) -> Dict[str, float]:
@@ -240,8 +348,8 @@ class CommissionEngine:
         total_partners = stats['total_partners']
         max_depth = stats['max_depth']
         
-        # Estimate memory usage (rough approximation)
-        estimated_memory_kb = total_partners * 0.5  # ~0.5KB per partner
+        # Estimate memory usage from slotted partner objects and array storage
+        estimated_memory_kb = self.tree.memory_usage_bytes() / 1024
         
         # Performance score based on tree structure
         performance_score = min(100.0, (10000 / max(total_partners, 1)) * 100)
@@ -250,6 +358,7 @@ class CommissionEngine:
             'total_partners': float(total_partners),
             'max_depth': float(max_depth),
             'estimated_memory_kb': estimated_memory_kb,
+            'memory_per_partner_kb': estimated_memory_kb / max(total_partners, 1),
             'performance_score': performance_score,
             'complexity_factor': float(max_depth * total_partners)
         }
@@ -277,7 +386,7 @@ class CommissionEngine:
         """Context manager exit - cleanup resources."""
         logger.debug("Exiting CommissionEngine context")
         if exc_type is not None:
-            logger.error(f"Exception in context: {exc_type.__name__}: {exc_val}")
+            logger.error("Exception in context: %s: %s", exc_type.__name__, exc_val)
         self.reset()
     
     def _ensure_tree_loaded(self) -> None:
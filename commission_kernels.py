@@ -0,0 +1,539 @@
+"""
+Compiled numeric kernels for the commission calculation hot path.
+
+Kernels are JIT-compiled with Numba when it is installed. Without Numba,
+the Cython build of ``commission_kernels_cy.pyx`` is used if it has been
+compiled (``cythonize -i commission_kernels_cy.pyx``); otherwise the
+pure-Python implementations are used transparently. Large forests are
+scanned per root subtree in parallel by the compiled kernels, with Numba's
+``prange`` or, for Cython, a thread pool over GIL-free calls.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from config import Constants
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    import commission_kernels_cy
+    CYTHON_AVAILABLE = True
+except ImportError:
+    CYTHON_AVAILABLE = False
+
+
+def _commission_scan_python(order: np.ndarray, parent_idx: np.ndarray,
+                            daily_profit: np.ndarray, rate: float,
+                            subtree: np.ndarray) -> np.ndarray:
+    """
+    Compute commissions with a single reverse-topological scan.
+    
+    Walking ``order`` backwards visits every partner after all of its
+    descendants. Children are summed before the partner's own profit is
+    added, matching the accumulation order of a post-order DFS.
+    
+    Args:
+        order: Topological order (parents before children)
+        parent_idx: Dense parent index per partner, -1 for roots
+        daily_profit: Daily profit per partner
+        rate: Commission rate applied to descendants' profits
+        subtree: Zeroed scratch array, filled with each partner's subtree profit
+    
+    Returns:
+        Array of commissions indexed by dense partner index
+    """
+    # Plain lists avoid per-element NumPy scalar overhead in the loop; they
+    # also beat array.array, which boxes a new float on every indexed read
+    parents = parent_idx.tolist()
+    daily = daily_profit.tolist()
+    totals = [0.0] * len(daily)
+    
+    for i in reversed(order.tolist()):
+        totals[i] += daily[i]
+        parent = parents[i]
+        if parent >= 0:
+            totals[parent] += totals[i]
+    
+    subtree[:] = totals
+    return (subtree - daily_profit) * rate
+
+
+def _commission_pipeline_python(order: np.ndarray, parent_idx: np.ndarray,
+                                monthly_revenue: np.ndarray, days_in_month: int,
+                                rate: float, daily_profit: np.ndarray,
+                                subtree: np.ndarray) -> np.ndarray:
+    """
+    Compute daily profits and commissions in a single fused scan.
+    
+    Each partner's daily profit is derived from monthly revenue right before
+    it is accumulated, so the arrays are walked once instead of twice.
+    
+    Args:
+        order: Topological order (parents before children)
+        parent_idx: Dense parent index per partner, -1 for roots
+        monthly_revenue: Monthly revenue per partner
+        days_in_month: Number of days to spread monthly revenue over
+        rate: Commission rate applied to descendants' profits
+        daily_profit: Output array filled with each partner's daily profit
+        subtree: Zeroed scratch array, filled with descendants' profit sums
+    
+    Returns:
+        Array of commissions indexed by dense partner index
+    """
+    parents = parent_idx.tolist()
+    revenue = monthly_revenue.tolist()
+    daily = [0.0] * len(revenue)
+    descendants = [0.0] * len(revenue)
+    commission = [0.0] * len(revenue)
+    
+    for i in reversed(order.tolist()):
+        profit = revenue[i] / days_in_month
+        daily[i] = profit
+        total = descendants[i] + profit
+        commission[i] = (total - profit) * rate
+        parent = parents[i]
+        if parent >= 0:
+            descendants[parent] += total
+    
+    daily_profit[:] = daily
+    subtree[:] = descendants
+    return np.array(commission, dtype=np.float64)
+
+
+def _compute_depths_python(order: np.ndarray, parent_idx: np.ndarray) -> np.ndarray:
+    """
+    Compute each partner's depth (roots are level 0) in one forward pass.
+    
+    Args:
+        order: Topological order (parents before children)
+        parent_idx: Dense parent index per partner, -1 for roots
+    
+    Returns:
+        Array of depths indexed by dense partner index
+    """
+    parents = parent_idx.tolist()
+    depth = [0] * len(parents)
+    
+    for i in order.tolist():
+        parent = parents[i]
+        if parent >= 0:
+            depth[i] = depth[parent] + 1
+    
+    return np.array(depth, dtype=np.int32)
+
+
+def _topological_order_python(roots: np.ndarray, child_offsets: np.ndarray,
+                              child_indices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Compute a parents-before-children order with Kahn's algorithm over CSR children.
+    
+    Each root's subtree is laid out contiguously, with ``root_offsets``
+    delimiting the slices, so independent subtrees can be scanned in
+    parallel. Siblings are enqueued in reverse so that a reverse scan of the
+    order visits each partner's children in their original order, keeping
+    floating-point accumulation identical to a post-order DFS. Partners on a
+    cycle are unreachable from the roots and left out.
+    
+    Args:
+        roots: Dense indices of root partners
+        child_offsets: CSR offsets into ``child_indices`` per partner
+        child_indices: Dense child indices grouped by parent
+    
+    Returns:
+        Tuple of (order, root_offsets)
+    """
+    offsets = child_offsets.tolist()
+    children = child_indices.tolist()
+    order: List[int] = []
+    root_offsets = [0]
+    
+    for root in roots.tolist():
+        head = len(order)
+        order.append(root)
+        
+        # The order list doubles as this root's BFS queue
+        while head < len(order):
+            i = order[head]
+            start, stop = offsets[i], offsets[i + 1]
+            order.extend(reversed(children[start:stop]))
+            head += 1
+        
+        root_offsets.append(len(order))
+    
+    return np.array(order, dtype=np.int32), np.array(root_offsets, dtype=np.int64)
+
+
+def _find_cycle_start_numpy(parent_idx: np.ndarray) -> int:
+    """
+    Find the first partner whose ancestor chain never reaches a root.
+    
+    Uses pointer doubling: roots (and partners with a missing parent) point
+    to themselves, and every step replaces each pointer with its pointer's
+    pointer, so after ``ceil(log2(n))`` vectorized gathers each partner
+    points at the end of its chain. Chains caught in a cycle never reach a
+    self-pointing terminal.
+    
+    Each step fully compresses every chain, so no separate safe-root memo is
+    kept. Restricting the gathers to still-unresolved partners was measured
+    2-6x slower than gathering the dense array.
+    
+    On large inputs each gather is split into contiguous chunks run on a
+    thread pool; ``np.take`` releases the GIL, so the chunks run in parallel.
+    
+    Args:
+        parent_idx: Dense parent index per partner, -1 for roots and
+            partners whose parent is missing
+    
+    Returns:
+        Dense index of the first partner on or below a cycle, or -1 if the
+        structure is acyclic
+    """
+    n = parent_idx.size
+    terminal = parent_idx < 0
+    jump = np.where(terminal, np.arange(n), parent_idx)
+    next_jump = np.empty_like(jump)
+    
+    workers = min(os.cpu_count() or 1, n // Constants.PARALLEL_MIN_PARTNERS)
+    bounds = np.linspace(0, n, max(workers, 1) + 1).astype(np.int64).tolist()
+    
+    with ThreadPoolExecutor(max_workers=workers) if workers > 1 else nullcontext() as pool:
+        for _ in range(max(n - 1, 1).bit_length()):
+            _gather_jumps(jump, next_jump, pool, bounds)
+            if np.array_equal(next_jump, jump):
+                break
+            jump, next_jump = next_jump, jump
+    
+    trapped = np.flatnonzero(~terminal[jump])
+    return int(trapped[0]) if trapped.size else -1
+
+
+def _gather_jumps(jump: np.ndarray, out: np.ndarray,
+                  pool: Optional[ThreadPoolExecutor], bounds: List[int]) -> None:
+    """Set ``out = jump[jump]``, one chunk per thread when a pool is given."""
+    if pool is None:
+        np.take(jump, jump, out=out)
+        return
+    
+    futures = [
+        pool.submit(np.take, jump, jump[start:stop], out=out[start:stop])
+        for start, stop in zip(bounds[:-1], bounds[1:])
+    ]
+    for future in futures:
+        future.result()
+
+
+def _root_spans(root_offsets: np.ndarray, workers: int) -> List[Tuple[int, int]]:
+    """
+    Group consecutive root subtrees into at most ``workers`` spans of ``order``.
+    
+    Span boundaries always fall on root boundaries, so spans write to
+    disjoint partners, and are chosen to give each span a similar number of
+    partners.
+    
+    Args:
+        root_offsets: Slice boundaries of each root's subtree in ``order``
+        workers: Maximum number of spans
+    
+    Returns:
+        List of (start, stop) slices of ``order``
+    """
+    targets = np.linspace(0, root_offsets[-1], workers + 1)
+    bounds = np.unique(root_offsets[np.searchsorted(root_offsets, targets)]).tolist()
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _thread_count(root_offsets: np.ndarray) -> int:
+    """Use one thread per root, capped at the number of CPUs."""
+    return min(root_offsets.size - 1, os.cpu_count() or 1)
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True, boundscheck=False)
+    def _scan_range(order, start, stop, parent_idx, daily_profit, subtree):
+        """Accumulate subtree profits over ``order[start:stop]`` in reverse."""
+        for k in range(stop - 1, start - 1, -1):
+            i = order[k]
+            subtree[i] += daily_profit[i]
+            p = parent_idx[i]
+            if p >= 0:
+                subtree[p] += subtree[i]
+    
+    @njit(cache=True, boundscheck=False)
+    def _pipeline_range(order, start, stop, parent_idx, monthly_revenue, days_in_month,
+                        rate, daily_profit, subtree, commission):
+        """Fused daily profit and commission scan over ``order[start:stop]``."""
+        for k in range(stop - 1, start - 1, -1):
+            i = order[k]
+            profit = monthly_revenue[i] / days_in_month
+            daily_profit[i] = profit
+            total = subtree[i] + profit
+            commission[i] = (total - profit) * rate
+            p = parent_idx[i]
+            if p >= 0:
+                subtree[p] += total
+    
+    @njit(cache=True, boundscheck=False)
+    def _commission_scan_numba(order, parent_idx, daily_profit, rate, subtree):
+        """Numba-compiled equivalent of ``_commission_scan_python``."""
+        _scan_range(order, 0, order.size, parent_idx, daily_profit, subtree)
+        return (subtree - daily_profit) * rate
+    
+    @njit(cache=True, boundscheck=False, parallel=True)
+    def _commission_scan_parallel(order, root_offsets, parent_idx, daily_profit, rate, subtree):
+        """Scan each root's slice of ``order`` on its own thread."""
+        for r in prange(root_offsets.size - 1):
+            _scan_range(order, root_offsets[r], root_offsets[r + 1],
+                        parent_idx, daily_profit, subtree)
+        return (subtree - daily_profit) * rate
+    
+    @njit(cache=True, boundscheck=False)
+    def _commission_pipeline_numba(order, parent_idx, monthly_revenue, days_in_month,
+                                   rate, daily_profit, subtree):
+        """Numba-compiled equivalent of ``_commission_pipeline_python``."""
+        commission = np.empty(monthly_revenue.size, dtype=np.float64)
+        _pipeline_range(order, 0, order.size, parent_idx, monthly_revenue, days_in_month,
+                        rate, daily_profit, subtree, commission)
+        return commission
+    
+    @njit(cache=True, boundscheck=False, parallel=True)
+    def _commission_pipeline_parallel(order, root_offsets, parent_idx, monthly_revenue,
+                                      days_in_month, rate, daily_profit, subtree):
+        """Run the fused scan for each root's slice of ``order`` on its own thread."""
+        commission = np.empty(monthly_revenue.size, dtype=np.float64)
+        for r in prange(root_offsets.size - 1):
+            _pipeline_range(order, root_offsets[r], root_offsets[r + 1], parent_idx,
+                            monthly_revenue, days_in_month, rate, daily_profit,
+                            subtree, commission)
+        return commission
+    
+    @njit(cache=True, boundscheck=False)
+    def _compute_depths_numba(order, parent_idx):
+        """Numba-compiled equivalent of ``_compute_depths_python``."""
+        depth = np.zeros(parent_idx.size, dtype=np.int32)
+        for k in range(order.size):
+            i = order[k]
+            p = parent_idx[i]
+            if p >= 0:
+                depth[i] = depth[p] + 1
+        return depth
+    
+    @njit(cache=True, boundscheck=False)
+    def _find_cycle_start_numba(parent_idx):
+        """
+        Compiled equivalent of ``_find_cycle_start_numpy`` in O(n).
+        
+        Walks each unvisited partner's parent chain, coloring it GRAY, until
+        a root or an already-safe (BLACK) partner; reaching GRAY again means
+        the chain loops. Safe paths are then re-walked and colored BLACK.
+        """
+        color = np.zeros(parent_idx.size, dtype=np.uint8)
+        for start in range(parent_idx.size):
+            if color[start] != 0:
+                continue
+            i = start
+            while i >= 0 and color[i] == 0:
+                color[i] = 1
+                i = parent_idx[i]
+            if i >= 0 and color[i] == 1:
+                return start
+            i = start
+            while i >= 0 and color[i] == 1:
+                color[i] = 2
+                i = parent_idx[i]
+        return -1
+    
+    @njit(cache=True, boundscheck=False)
+    def _topological_order_numba(roots, child_offsets, child_indices):
+        """Numba-compiled equivalent of ``_topological_order_python``."""
+        order = np.empty(child_offsets.size - 1, dtype=np.int32)
+        root_offsets = np.zeros(roots.size + 1, dtype=np.int64)
+        size = 0
+        for r in range(roots.size):
+            head = size
+            order[size] = roots[r]
+            size += 1
+            while head < size:
+                i = order[head]
+                for c in range(child_offsets[i + 1] - 1, child_offsets[i] - 1, -1):
+                    order[size] = child_indices[c]
+                    size += 1
+                head += 1
+            root_offsets[r + 1] = size
+        return order[:size], root_offsets
+    
+    _commission_scan = _commission_scan_numba
+    _commission_pipeline = _commission_pipeline_numba
+    compute_depths = _compute_depths_numba
+    topological_order = _topological_order_numba
+    find_cycle_start = _find_cycle_start_numba
+elif CYTHON_AVAILABLE:
+    # The Cython range kernels release the GIL, so spans of root subtrees
+    # run concurrently on plain threads
+    def _commission_scan_parallel(order, root_offsets, parent_idx, daily_profit, rate, subtree):
+        """Scan spans of root subtrees on a thread pool."""
+        spans = _root_spans(root_offsets, _thread_count(root_offsets))
+        with ThreadPoolExecutor(max_workers=len(spans)) as pool:
+            futures = [
+                pool.submit(commission_kernels_cy.scan_range, order, start, stop,
+                            parent_idx, daily_profit, subtree)
+                for start, stop in spans
+            ]
+            for future in futures:
+                future.result()
+        return (subtree - daily_profit) * rate
+    
+    def _commission_pipeline_parallel(order, root_offsets, parent_idx, monthly_revenue,
+                                      days_in_month, rate, daily_profit, subtree):
+        """Run the fused scan for spans of root subtrees on a thread pool."""
+        commission = np.empty(monthly_revenue.size, dtype=np.float64)
+        spans = _root_spans(root_offsets, _thread_count(root_offsets))
+        with ThreadPoolExecutor(max_workers=len(spans)) as pool:
+            futures = [
+                pool.submit(commission_kernels_cy.pipeline_range, order, start, stop,
+                            parent_idx, monthly_revenue, days_in_month, rate,
+                            daily_profit, subtree, commission)
+                for start, stop in spans
+            ]
+            for future in futures:
+                future.result()
+        return commission
+    
+    _commission_scan = commission_kernels_cy.commission_scan
+    _commission_pipeline = commission_kernels_cy.commission_pipeline
+    compute_depths = _compute_depths_python
+    topological_order = _topological_order_python
+    find_cycle_start = _find_cycle_start_numpy
+else:
+    _commission_scan = _commission_scan_python
+    _commission_pipeline = _commission_pipeline_python
+    compute_depths = _compute_depths_python
+    topological_order = _topological_order_python
+    find_cycle_start = _find_cycle_start_numpy
+
+
+def _prange_allowed() -> bool:
+    """
+    Check whether Numba's ``prange`` kernels may run on the calling thread.
+    
+    With the TBB threading layer, which Numba picks by default when it is
+    installed, launching a parallel kernel off the main thread hangs the
+    interpreter at exit. Worker threads therefore take the serial kernels;
+    the Cython thread pool has no such restriction.
+    """
+    return not NUMBA_AVAILABLE or threading.current_thread() is threading.main_thread()
+
+
+def _should_parallelize(root_offsets: Optional[np.ndarray], size: int) -> bool:
+    """Use the per-root parallel kernels only where thread dispatch pays off."""
+    return (
+        (NUMBA_AVAILABLE or CYTHON_AVAILABLE)
+        and root_offsets is not None
+        and root_offsets.size - 1 >= 2
+        and size >= Constants.PARALLEL_MIN_PARTNERS
+        and _prange_allowed()
+    )
+
+
+def commission_scan(order: np.ndarray, parent_idx: np.ndarray, daily_profit: np.ndarray,
+                    rate: float, root_offsets: Optional[np.ndarray] = None,
+                    subtree: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Compute commissions with a single reverse-topological scan.
+    
+    When ``root_offsets`` delimits independent root subtrees in ``order``
+    and the forest is large enough, subtrees are scanned in parallel; they
+    write to disjoint indices, so there are no races.
+    
+    Args:
+        order: Topological order (parents before children)
+        parent_idx: Dense parent index per partner, -1 for roots
+        daily_profit: Daily profit per partner
+        rate: Commission rate applied to descendants' profits
+        root_offsets: Optional slice boundaries of each root's subtree in ``order``
+        subtree: Optional zeroed float64 scratch array of the same length as
+            ``daily_profit``, so callers can reuse one buffer across runs
+    
+    Returns:
+        Array of commissions indexed by dense partner index
+    """
+    if subtree is None:
+        subtree = np.zeros(daily_profit.size, dtype=np.float64)
+    if _should_parallelize(root_offsets, order.size):
+        return _commission_scan_parallel(order, root_offsets, parent_idx, daily_profit,
+                                         rate, subtree)
+    return _commission_scan(order, parent_idx, daily_profit, rate, subtree)
+
+
+def commission_pipeline(order: np.ndarray, parent_idx: np.ndarray,
+                        monthly_revenue: np.ndarray, days_in_month: int, rate: float,
+                        daily_profit: np.ndarray,
+                        root_offsets: Optional[np.ndarray] = None,
+                        subtree: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Compute daily profits and commissions in a single fused scan.
+    
+    Parallelizes over root subtrees under the same conditions as
+    ``commission_scan``.
+    
+    Args:
+        order: Topological order (parents before children)
+        parent_idx: Dense parent index per partner, -1 for roots
+        monthly_revenue: Monthly revenue per partner
+        days_in_month: Number of days to spread monthly revenue over
+        rate: Commission rate applied to descendants' profits
+        daily_profit: Output array filled with each partner's daily profit
+        root_offsets: Optional slice boundaries of each root's subtree in ``order``
+        subtree: Optional zeroed float64 scratch array, as for ``commission_scan``
+    
+    Returns:
+        Array of commissions indexed by dense partner index
+    """
+    if subtree is None:
+        subtree = np.zeros(monthly_revenue.size, dtype=np.float64)
+    if _should_parallelize(root_offsets, order.size):
+        return _commission_pipeline_parallel(order, root_offsets, parent_idx, monthly_revenue,
+                                             days_in_month, rate, daily_profit, subtree)
+    return _commission_pipeline(order, parent_idx, monthly_revenue, days_in_month,
+                                rate, daily_profit, subtree)
+
+
+_warmed_up = False
+
+
+def warm_up() -> None:
+    """
+    Compile kernels ahead of the first real call.
+    
+    Runs each kernel once on a two-partner tree so JIT compilation (or cache
+    loading) doesn't show up in the first timed calculation.
+    """
+    global _warmed_up
+    if _warmed_up or not NUMBA_AVAILABLE:
+        return
+    
+    order = np.array([0, 1], dtype=np.int32)
+    root_offsets = np.array([0, 1, 2], dtype=np.int64)
+    parent_idx = np.array([-1, -1], dtype=np.int32)
+    daily_profit = np.zeros(2, dtype=np.float64)
+    subtree = np.zeros(2, dtype=np.float64)
+    _commission_scan(order, parent_idx, daily_profit, 0.0, subtree)
+    _commission_pipeline(order, parent_idx, daily_profit.copy(), 30, 0.0, daily_profit, subtree)
+    if _prange_allowed():
+        _commission_scan_parallel(order, root_offsets, parent_idx, daily_profit, 0.0, subtree)
+        _commission_pipeline_parallel(order, root_offsets, parent_idx, daily_profit.copy(),
+                                      30, 0.0, daily_profit, subtree)
+    compute_depths(order, parent_idx)
+    topological_order(order, np.zeros(3, dtype=np.int32), np.empty(0, dtype=np.int32))
+    # CycleDetector passes intp parent links, a separate specialization
+    find_cycle_start(np.array([-1, 0], dtype=np.intp))
+    _warmed_up = True
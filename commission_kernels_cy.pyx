@@ -0,0 +1,83 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""
+Cython commission kernels, used by commission_kernels when Numba is absent.
+
+Build in place with:
+
+    cythonize -i commission_kernels_cy.pyx
+"""
+
+import numpy as np
+
+
+cdef inline void _scan_range(const int[:] order, Py_ssize_t start, Py_ssize_t stop,
+                             const int[:] parent_idx, const double[:] daily_profit,
+                             double[:] subtree) noexcept nogil:
+    """Accumulate subtree profits over ``order[start:stop]`` in reverse."""
+    cdef Py_ssize_t k
+    cdef int i, p
+    for k in range(stop - 1, start - 1, -1):
+        i = order[k]
+        subtree[i] += daily_profit[i]
+        p = parent_idx[i]
+        if p >= 0:
+            subtree[p] += subtree[i]
+
+
+cpdef commission_scan(const int[:] order, const int[:] parent_idx,
+                      const double[:] daily_profit, double rate, double[:] subtree):
+    """Cython equivalent of ``commission_kernels._commission_scan_python``."""
+    with nogil:
+        _scan_range(order, 0, order.shape[0], parent_idx, daily_profit, subtree)
+
+    return (np.asarray(subtree) - np.asarray(daily_profit)) * rate
+
+
+cpdef scan_range(const int[:] order, Py_ssize_t start, Py_ssize_t stop,
+                 const int[:] parent_idx, const double[:] daily_profit, double[:] subtree):
+    """Scan one span of root subtrees without holding the GIL, for thread pools."""
+    with nogil:
+        _scan_range(order, start, stop, parent_idx, daily_profit, subtree)
+
+
+cdef inline void _pipeline_range(const int[:] order, Py_ssize_t start, Py_ssize_t stop,
+                                 const int[:] parent_idx, const double[:] monthly_revenue,
+                                 long days_in_month, double rate, double[:] daily_profit,
+                                 double[:] subtree, double[:] commission) noexcept nogil:
+    """Fused daily profit and commission scan over ``order[start:stop]``."""
+    cdef Py_ssize_t k
+    cdef int i, p
+    cdef double profit, total
+    for k in range(stop - 1, start - 1, -1):
+        i = order[k]
+        profit = monthly_revenue[i] / days_in_month
+        daily_profit[i] = profit
+        total = subtree[i] + profit
+        commission[i] = (total - profit) * rate
+        p = parent_idx[i]
+        if p >= 0:
+            subtree[p] += total
+
+
+cpdef commission_pipeline(const int[:] order, const int[:] parent_idx,
+                          const double[:] monthly_revenue, long days_in_month,
+                          double rate, double[:] daily_profit, double[:] subtree):
+    """Cython equivalent of ``commission_kernels._commission_pipeline_python``."""
+    commission_arr = np.empty(monthly_revenue.shape[0], dtype=np.float64)
+    cdef double[:] commission = commission_arr
+
+    with nogil:
+        _pipeline_range(order, 0, order.shape[0], parent_idx, monthly_revenue,
+                        days_in_month, rate, daily_profit, subtree, commission)
+
+    return commission_arr
+
+
+cpdef pipeline_range(const int[:] order, Py_ssize_t start, Py_ssize_t stop,
+                     const int[:] parent_idx, const double[:] monthly_revenue,
+                     long days_in_month, double rate, double[:] daily_profit,
+                     double[:] subtree, double[:] commission):
+    """Run the fused scan on one span of root subtrees without holding the GIL."""
+    with nogil:
+        _pipeline_range(order, start, stop, parent_idx, monthly_revenue,
+                        days_in_month, rate, daily_profit, subtree, commission)
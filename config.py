@@ -5,7 +5,7 @@ This module centralizes all configuration constants and error messages
 to follow the DRY principle and make maintenance easier.
 """
 
-from typing import Final
+from typing import Any, Final
 
 
 class Constants:
@@ -13,14 +13,17 @@ class Constants:
     
     # Business logic constants
     COMMISSION_RATE: Final[float] = 0.05  # 5% commission rate
+    ROUNDING_TIE_TOLERANCE: Final[float] = 1e-6  # Distance from a half-unit treated as a tie
     
     # File I/O constants
     DEFAULT_ENCODING: Final[str] = 'utf-8'
     JSON_INDENT: Final[int] = 2
+    MMAP_MIN_BYTES: Final[int] = 1 << 20  # Smaller inputs are read in one call instead
     
     # Performance thresholds
     MEMORY_THRESHOLD_KB_PER_PARTNER: Final[float] = 2.0
     TARGET_PERFORMANCE_SECONDS: Final[float] = 2.0
+    PARALLEL_MIN_PARTNERS: Final[int] = 20000  # Below this, thread dispatch outweighs the scan
     
     # Benchmark configuration
     DEFAULT_BENCHMARK_MAX_DEPTH: Final[int] = 10
@@ -28,20 +31,69 @@ class Constants:
 
 
 class ErrorMessages:
-    """Centralized error messages following message catalog pattern."""
+    """
+    Centralized error messages following message catalog pattern.
+    
+    Messages with parameters are built by static helpers using f-strings,
+    which avoids re-parsing a ``str.format`` template at every raise site.
+    """
     
     # Structural errors
-    PARENT_NOT_FOUND: Final[str] = "Parent {parent_id} not found for partner {partner_id}"
-    CYCLE_DETECTED: Final[str] = "Cycle detected involving partner {partner_id}"
     NO_ROOT_PARTNERS: Final[str] = "No root partners found"
     
     # State errors  
     NO_PARTNERS_LOADED: Final[str] = "No partners loaded. Call load_partners() first."
     
     # Input validation errors
-    INVALID_DATE: Final[str] = "Invalid date: {date}"
-    INVALID_INPUT_TYPE: Final[str] = "Expected {expected_type}, got {actual_type}"
+    EMPTY_PARTNER_DATA: Final[str] = "Partner data cannot be empty"
+    
+    @staticmethod
+    def partner_not_dict(index: int) -> str:
+        """Message for an input record that is not a JSON object."""
+        return f"Partner data at index {index} must be a dictionary"
+    
+    @staticmethod
+    def missing_fields(index: int, fields: Any) -> str:
+        """Message for an input record without its required fields."""
+        return f"Partner at index {index} missing required fields: {fields}"
+    
+    @staticmethod
+    def invalid_partner_id(index: int) -> str:
+        """Message for a partner ID that is not an integer."""
+        return f"Partner ID at index {index} must be integer"
+    
+    @staticmethod
+    def invalid_revenue(index: int) -> str:
+        """Message for a monthly revenue that is not a number."""
+        return f"Monthly revenue at index {index} must be numeric"
+    
+    @staticmethod
+    def invalid_input_type(expected_type: str, actual_type: str) -> str:
+        """Message for input of the wrong type."""
+        return f"Expected {expected_type}, got {actual_type}"
+    
+    @staticmethod
+    def parent_not_found(parent_id: Any, partner_id: Any) -> str:
+        """Message for a partner whose parent ID is not in the input."""
+        return f"Parent {parent_id} not found for partner {partner_id}"
+    
+    @staticmethod
+    def cycle_detected(partner_id: Any) -> str:
+        """Message for a partner that is part of a cycle."""
+        return f"Cycle detected involving partner {partner_id}"
+    
+    @staticmethod
+    def duplicate_partner_id(partner_id: Any, index: int) -> str:
+        """Message for a partner ID that appears more than once in the input."""
+        return f"Duplicate partner ID {partner_id} at index {index}"
     
     # File I/O errors
-    FILE_NOT_FOUND: Final[str] = "File not found: {filepath}"
-    INVALID_JSON: Final[str] = "Invalid JSON format in file: {filepath}"
+    @staticmethod
+    def file_not_found(filepath: Any) -> str:
+        """Message for a missing input file."""
+        return f"File not found: {filepath}"
+    
+    @staticmethod
+    def invalid_json(filepath: Any) -> str:
+        """Message for an input file that is not valid JSON."""
+        return f"Invalid JSON format in file: {filepath}"
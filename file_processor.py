@@ -2,7 +2,8 @@
 File processing facade for MLM Commission Engine.
 """
 
-from typing import Optional
+from typing import Callable, Iterable, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import logging
 
@@ -39,21 +40,73 @@ class FileProcessor:
             include_stats: Whether to include statistics in output
             
         Returns:
-            Dictionary with processing results and optional statistics
+            Dictionary with processing results and optional statistics;
+            ``processing_date`` is the date actually used for the calculation
         """
+        # Resolve the date once so the calculation and the report agree
+        resolved_date = target_date if target_date is not None else datetime.now()
+        return self._process_file(input_file, output_file, resolved_date,
+                                  include_stats, self._save_results)
+    
+    def process_many(self, jobs: Iterable[Tuple[str, str]],
+                     target_date: Optional[datetime] = None,
+                     include_stats: bool = False) -> List[dict]:
+        """
+        Process several commission files, overlapping output writes with work.
+        
+        Each output file is written on a background thread while the next
+        input file is loaded and calculated. Every run returns a fresh
+        commissions dictionary, so a pending write never sees later results.
+        
+        Args:
+            jobs: Iterable of (input_file, output_file) path pairs
+            target_date: Date for calculation (defaults to current date),
+                shared by all files in the batch
+            include_stats: Whether to include statistics in each result
+            
+        Returns:
+            List of processing results in job order, as returned by
+            ``process_commission_file``
+            
+        Raises:
+            Exception: The first processing or write error; writes already
+                submitted are finished before it propagates
+        """
+        resolved_date = target_date if target_date is not None else datetime.now()
+        results = []
+        
+        with ThreadPoolExecutor(max_workers=1) as writer:
+            writes = []
+            
+            def submit_write(output_file: str, commissions: dict) -> None:
+                writes.append(writer.submit(self._save_results, output_file, commissions))
+            
+            for input_file, output_file in jobs:
+                results.append(self._process_file(input_file, output_file, resolved_date,
+                                                  include_stats, submit_write))
+            
+            for write in writes:
+                write.result()
+        
+        return results
+    
+    def _process_file(self, input_file: str, output_file: str, target_date: datetime,
+                      include_stats: bool,
+                      save_results: Callable[[str, dict], None]) -> dict:
+        """Run one input file through the engine and hand its results to ``save_results``."""
         try:
-            self.logger.info(f"Starting commission processing: {input_file} -> {output_file}")
+            self.logger.info("Starting commission processing: %s -> %s", input_file, output_file)
             
-            # Load and validate input data
-            data = FileUtils.read_json(input_file)
-            self.logger.info(f"Loaded {len(data)} partners from input file")
+            # Load and validate input data and build the tree; the parsed
+            # dictionaries are released before results are allocated
+            partner_count = self.engine.load_partners_file(input_file)
+            self.logger.info("Loaded %d partners from input file", partner_count)
             
             # Process commission calculation
-            result = self._process_commissions(data, target_date)
+            result = self._process_commissions(partner_count, target_date)
             
             # Save results
-            FileUtils.write_json(output_file, result['commissions'])
-            self.logger.info(f"Commission results saved to {output_file}")
+            save_results(output_file, result['commissions'])
             
             # Add statistics if requested
             if include_stats:
@@ -64,50 +117,49 @@ class FileProcessor:
             return result
             
         except Exception as e:
-            self.logger.error(f"Commission processing failed: {str(e)}")
+            self.logger.error("Commission processing failed: %s", e)
             raise
     
-    def _process_commissions(self, data: list, target_date: Optional[datetime]) -> dict:
-        """Internal method to process commission calculations."""
-        # Load partners and build tree
-        self.engine.load_partners(data)
-        
-        # Calculate daily profits
-        self.engine.calculate_daily_profits(target_date)
-        
-        # Calculate commissions
-        commissions = self.engine.calculate_commissions()
+    def _save_results(self, output_file: str, commissions: dict) -> None:
+        """Write commission results to the output file."""
+        FileUtils.write_json(output_file, commissions)
+        self.logger.info("Commission results saved to %s", output_file)
+    
+    def _process_commissions(self, partner_count: int, target_date: datetime) -> dict:
+        """Internal method to process commission calculations on the loaded tree."""
+        # Calculate daily profits and commissions in one pass
+        commissions = self.engine.calculate(target_date)
         
         return {
             'commissions': commissions,
-            'total_partners': len(data),
-            'processing_date': target_date.isoformat() if target_date else None
+            'total_partners': partner_count,
+            'processing_date': target_date.isoformat()
         }
     
-    def validate_input_file(self, input_file: str) -> dict:
+    def validate_input_file(self, input_file: str, include_stats: bool = True) -> dict:
         """
         Validate input file structure without processing.
         
         Args:
             input_file: Path to input file to validate
+            include_stats: Whether to compute network statistics for a valid file
             
         Returns:
             Dictionary with validation results
         """
         try:
-            data = FileUtils.read_json(input_file)
-            
             # Try to build tree to validate structure
             temp_engine = CommissionEngine()
-            temp_engine.load_partners(data)
-            stats = temp_engine.get_stats()
+            partner_count = temp_engine.load_partners_file(input_file)
             
-            return {
+            result = {
                 'valid': True,
-                'partner_count': len(data),
-                'statistics': stats,
+                'partner_count': partner_count,
                 'message': 'Input file is valid'
             }
+            if include_stats:
+                result['statistics'] = temp_engine.get_stats()
+            return result
             
         except Exception as e:
             return {
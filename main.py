@@ -6,17 +6,65 @@ Usage:
     python main.py --input partners.json --output commissions.json
 """
 
-import argparse
 import sys
-import time
 import logging
-from pathlib import Path
 
-from file_processor import FileProcessor
+__version__ = "1.0.0"
+
+USAGE = """\
+usage: main.py [-h] [--version] --input INPUT --output OUTPUT [--verbose]
+               [--validate-only] [--include-stats]
+
+Calculate daily commissions for MLM partner network
+
+options:
+  -h, --help            show this help message and exit
+  --version             show program's version number and exit
+  --input INPUT, -i INPUT
+                        Input JSON file with partner data
+  --output OUTPUT, -o OUTPUT
+                        Output JSON file for commission results
+  --verbose, -v         Enable verbose output with statistics and logging
+  --validate-only       Only validate input file structure without processing
+  --include-stats       Include network statistics in verbose output
+
+Examples:
+    python main.py --input dataset.json --output commissions.json
+    python main.py -i partners.json -o results.json --verbose
+    python main.py --input data.json --output results.json --validate-only
+"""
+
+
+def handle_fast_path(argv: list) -> None:
+    """
+    Answer ``--version``, ``--help`` and argument-less calls without argparse.
+    
+    These are the most common interactive invocations, so they exit before
+    the argument parser is built or any engine module is imported.
+    
+    Args:
+        argv: Command-line arguments, excluding the program name
+    """
+    if not argv:
+        sys.stderr.write(USAGE)
+        sys.exit(2)
+    
+    if argv[0] == '--version':
+        print(f"main.py {__version__}")
+        sys.exit(0)
+    
+    if argv[0] in ('-h', '--help'):
+        sys.stdout.write(USAGE)
+        sys.exit(0)
 
 
 def setup_logging(verbose: bool = False) -> logging.Logger:
-    """Setup logging configuration."""
+    """
+    Setup logging configuration.
+    
+    Only called once arguments have been validated, so ``--help`` and
+    argument errors don't pay for handler setup.
+    """
     level = logging.INFO if verbose else logging.WARNING
     logging.basicConfig(
         level=level,
@@ -25,8 +73,15 @@ def setup_logging(verbose: bool = False) -> logging.Logger:
     return logging.getLogger(__name__)
 
 
-def main():
-    """Main entry point for the commission calculation CLI."""
+def build_parser() -> 'argparse.ArgumentParser':
+    """
+    Build the CLI argument parser.
+    
+    ``USAGE`` is this parser's help text, kept as a literal for the fast
+    path; the test suite checks the two stay in sync.
+    """
+    import argparse
+    
     parser = argparse.ArgumentParser(
         description="Calculate daily commissions for MLM partner network",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -35,7 +90,13 @@ Examples:
     python main.py --input dataset.json --output commissions.json
     python main.py -i partners.json -o results.json --verbose
     python main.py --input data.json --output results.json --validate-only
-        """
+"""
+    )
+    
+    parser.add_argument(
+        '--version',
+        action='version',
+        version=f"%(prog)s {__version__}"
     )
     
     parser.add_argument(
@@ -70,15 +131,26 @@ Examples:
         help='Include network statistics in verbose output'
     )
     
-    args = parser.parse_args()
+    return parser
+
+
+def main():
+    """Main entry point for the commission calculation CLI."""
+    handle_fast_path(sys.argv[1:])
     
-    # Setup logging
+    args = build_parser().parse_args()
+    
+    # Heavy modules are imported only once arguments have been parsed
+    from pathlib import Path
+    
+    # Setup logging on the root logger, so records from every module share
+    # one level and format, including in quiet validation
     logger = setup_logging(args.verbose)
     
     # Validate input file exists
     input_path = Path(args.input)
     if not input_path.exists():
-        logger.error(f"Input file '{args.input}' not found")
+        logger.error("Input file '%s' not found", args.input)
         sys.exit(1)
     
     # Ensure output directory exists
@@ -86,13 +158,19 @@ Examples:
     output_path.parent.mkdir(parents=True, exist_ok=True)
     
     try:
+        from file_processor import FileProcessor
+        
         # Initialize file processor
         processor = FileProcessor(logger)
         
+        # Statistics cost extra tree passes, so only compute them on request;
+        # they are printed in verbose mode as before
+        include_stats = args.include_stats or args.verbose
+        
         # Handle validation-only mode
         if args.validate_only:
-            logger.info(f"Validating input file: {args.input}")
-            result = processor.validate_input_file(args.input)
+            logger.info("Validating input file: %s", args.input)
+            result = processor.validate_input_file(args.input, include_stats=include_stats)
             
             if result['valid']:
                 print(f"✓ {result['message']}")
@@ -108,14 +186,15 @@ Examples:
             return
         
         # Process commission calculation
+        import time
         start_time = time.time()
         if args.verbose:
-            logger.info(f"Processing {args.input}...")
+            logger.info("Processing %s...", args.input)
         
         result = processor.process_commission_file(
             args.input, 
             args.output,
-            include_stats=args.include_stats or args.verbose
+            include_stats=include_stats
         )
         
         end_time = time.time()
@@ -141,7 +220,7 @@ Examples:
             print(f"Commission calculation completed. Results saved to {args.output}")
     
     except Exception as e:
-        logger.error(f"Processing failed: {e}")
+        logger.error("Processing failed: %s", e)
         if args.verbose:
             import traceback
             traceback.print_exc()
@@ -2,24 +2,84 @@
 Original Commission Engine for comparison.
 """
 
-from typing import Dict, List, Optional, Set
+from typing import Dict, List, Optional
 import json
 import calendar
 from datetime import datetime
+from functools import lru_cache
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def _accumulate_python(post_order_idx: np.ndarray, parent_idx: np.ndarray,
+                       daily_profit: np.ndarray, subtree: np.ndarray) -> None:
+    # Each partner's subtree receives its children's totals before its own
+    # profit is added, matching the recursive accumulation order
+    parents = parent_idx.tolist()
+    daily = daily_profit.tolist()
+    totals = [0.0] * len(daily)
+    
+    for i in post_order_idx.tolist():
+        totals[i] += daily[i]
+        parent = parents[i]
+        if parent >= 0:
+            totals[parent] += totals[i]
+    
+    subtree[:] = totals
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _accumulate(post_order_idx, parent_idx, daily_profit, subtree):
+        for k in range(post_order_idx.shape[0]):
+            i = post_order_idx[k]
+            subtree[i] += daily_profit[i]
+            p = parent_idx[i]
+            if p >= 0:
+                subtree[p] += subtree[i]
+else:
+    _accumulate = _accumulate_python
+
+
+def _round_cents(values: np.ndarray) -> np.ndarray:
+    # np.round scales by 100 first and can land on the other side of a
+    # half-cent tie than Python's round, so re-round those few with round()
+    rounded = np.round(values, 2)
+    scaled = values * 100.0
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for i in np.flatnonzero(near_tie).tolist():
+        rounded[i] = round(float(values[i]), 2)
+    return rounded
+
+
+@lru_cache(maxsize=None)
+def _days_in_month(year: int, month: int) -> int:
+    return calendar.monthrange(year, month)[1]
 
 
 class OriginalPartner:
     """Represents a partner in the MLM network."""
     
+    __slots__ = ('id', 'parent_id', 'name', 'monthly_revenue')
+    
     def __init__(self, partner_id: int, parent_id: Optional[int], 
                  name: str, monthly_revenue: float):
         self.id = partner_id
         self.parent_id = parent_id
         self.name = name
         self.monthly_revenue = monthly_revenue
-        self.children: List['OriginalPartner'] = []
-        self.daily_profit: float = 0.0
-        self.total_commission: float = 0.0
 
 
 class OriginalCommissionEngine:
@@ -27,14 +87,29 @@ class OriginalCommissionEngine:
     
     COMMISSION_RATE = 0.05  # 5% commission rate
     
+    # DFS colors for cycle detection
+    WHITE, GRAY, BLACK = 0, 1, 2
+    
     def __init__(self):
         self.partners: Dict[int, OriginalPartner] = {}
         self.roots: List[OriginalPartner] = []
-        self.visited: Set[int] = set()
-        self.rec_stack: Set[int] = set()
+        
+        # Structure-of-Arrays storage indexed by dense partner index
+        self.ids = np.empty(0, dtype=np.int64)
+        self.id_strs: List[str] = []
+        self.index_of: Dict[int, int] = {}
+        self.parent_idx = np.empty(0, dtype=np.int32)
+        self.monthly_revenue = np.empty(0, dtype=np.float64)
+        self.child_ptr = np.zeros(1, dtype=np.int32)
+        self.child_idx = np.empty(0, dtype=np.int32)
+        self.daily_profit = np.empty(0, dtype=np.float64)
+        self.total_commission = np.empty(0, dtype=np.float64)
+        self.post_order_idx = np.empty(0, dtype=np.int32)
     
     def load_partners(self, data: List[Dict]) -> None:
-        # Create all partner objects first
+        # Create partners and check parents in one pass; parents that appear
+        # later in the data are resolved once all partners exist
+        pending: List[OriginalPartner] = []
         for item in data:
             partner = OriginalPartner(
                 partner_id=item['id'],
@@ -43,94 +118,143 @@ class OriginalCommissionEngine:
                 monthly_revenue=item['monthly_revenue']
             )
             self.partners[partner.id] = partner
+            if partner.parent_id is not None and partner.parent_id not in self.partners:
+                pending.append(partner)
         
-        # Build parent-child relationships
-        for partner in self.partners.values():
-            if partner.parent_id is None:
-                self.roots.append(partner)
-            else:
-                if partner.parent_id not in self.partners:
-                    raise ValueError(f"Parent {partner.parent_id} not found for partner {partner.id}")
-                parent = self.partners[partner.parent_id]
-                parent.children.append(partner)
+        for partner in pending:
+            if partner.parent_id not in self.partners:
+                raise ValueError(f"Parent {partner.parent_id} not found for partner {partner.id}")
         
-        # Detect cycles
-        self._detect_cycles()
+        # Roots, children and the cached traversal order are rebuilt on every load
+        self._build_arrays()
+        
+        # Traversal order is invariant across dates, so compute it once here.
+        # Partners on a cycle are unreachable from the roots, so a short
+        # order doubles as cycle detection; the full color scan only runs to
+        # name the offending partner.
+        post_order = self._build_post_order()
+        if len(post_order) < len(self.index_of):
+            self._detect_cycles()
         
         if not self.roots:
             raise ValueError("No root partners found")
+        
+        self.post_order_idx = np.array(post_order, dtype=np.int32)
     
     def _detect_cycles(self) -> None:
-        self.visited.clear()
-        self.rec_stack.clear()
+        # One byte of DFS color per dense partner index instead of hashed sets
+        color = bytearray(len(self.index_of))
+        child_ptr = self.child_ptr.tolist()
+        child_idx = self.child_idx.tolist()
         
-        for partner in self.partners.values():
-            if partner.id not in self.visited:
-                if self._has_cycle_util(partner):
-                    raise ValueError(f"Cycle detected involving partner {partner.id}")
+        for start, partner_id in enumerate(self.ids.tolist()):
+            if color[start] == self.WHITE:
+                if self._has_cycle_util(start, color, child_ptr, child_idx):
+                    raise ValueError(f"Cycle detected involving partner {partner_id}")
     
-    def _has_cycle_util(self, partner: OriginalPartner) -> bool:
-        self.visited.add(partner.id)
-        self.rec_stack.add(partner.id)
+    def _has_cycle_util(self, start: int, color: bytearray,
+                        child_ptr: List[int], child_idx: List[int]) -> bool:
+        # Iterative DFS: each stack entry keeps a cursor into its CSR children
+        color[start] = self.GRAY
+        stack = [(start, child_ptr[start])]
         
-        for child in partner.children:
-            if child.id not in self.visited:
-                if self._has_cycle_util(child):
+        while stack:
+            node, cursor = stack[-1]
+            if cursor < child_ptr[node + 1]:
+                stack[-1] = (node, cursor + 1)
+                child = child_idx[cursor]
+                if color[child] == self.WHITE:
+                    color[child] = self.GRAY
+                    stack.append((child, child_ptr[child]))
+                elif color[child] == self.GRAY:
                     return True
-            elif child.id in self.rec_stack:
-                return True
+            else:
+                color[node] = self.BLACK
+                stack.pop()
         
-        self.rec_stack.remove(partner.id)
         return False
     
-    def calculate_daily_profits(self, target_date: Optional[datetime] = None) -> None:
-        if target_date is None:
-            target_date = datetime.now()
+    def _build_post_order(self) -> List[int]:
+        # Dense indices, children before parents, siblings in their original order
+        child_ptr = self.child_ptr.tolist()
+        child_idx = self.child_idx.tolist()
+        post_order: List[int] = []
         
-        days_in_month = calendar.monthrange(target_date.year, target_date.month)[1]
+        for root in self.roots:
+            stack = [(self.index_of[root.id], False)]
+            while stack:
+                i, expanded = stack.pop()
+                if expanded:
+                    post_order.append(i)
+                else:
+                    stack.append((i, True))
+                    stack.extend(
+                        (child_idx[k], False)
+                        for k in range(child_ptr[i + 1] - 1, child_ptr[i] - 1, -1)
+                    )
         
-        for partner in self.partners.values():
-            partner.daily_profit = partner.monthly_revenue / days_in_month
+        return post_order
     
-    def calculate_commissions(self) -> Dict[str, float]:
-        # Reset commission calculations
-        for partner in self.partners.values():
-            partner.total_commission = 0.0
+    def _build_arrays(self) -> None:
+        partners = list(self.partners.values())
+        n = len(partners)
         
-        # Calculate commissions using post-order traversal
-        for root in self.roots:
-            self._calculate_subtree_commission(root)
+        try:
+            self.ids = np.fromiter((p.id for p in partners), dtype=np.int64, count=n)
+        except OverflowError:
+            # IDs beyond int64 are valid input; keep them as exact Python ints
+            self.ids = np.array([p.id for p in partners], dtype=object)
+        self.id_strs = [str(p.id) for p in partners]
+        self.index_of = {p.id: i for i, p in enumerate(partners)}
+        self.roots = [p for p in partners if p.parent_id is None]
+        self.parent_idx = np.fromiter(
+            (-1 if p.parent_id is None else self.index_of[p.parent_id] for p in partners),
+            dtype=np.int32, count=n
+        )
+        self.monthly_revenue = np.fromiter(
+            (p.monthly_revenue for p in partners), dtype=np.float64, count=n
+        )
+        self.daily_profit = np.zeros(n, dtype=np.float64)
+        self.total_commission = np.zeros(n, dtype=np.float64)
         
-        # Format output with 2 decimal precision
-        return {
-            str(partner.id): round(partner.total_commission, 2)
-            for partner in self.partners.values()
-        }
+        # CSR children: children of i are child_idx[child_ptr[i]:child_ptr[i + 1]],
+        # kept in input order by the stable sort
+        non_roots = np.flatnonzero(self.parent_idx >= 0)
+        parents = self.parent_idx[non_roots]
+        self.child_ptr = np.zeros(n + 1, dtype=np.int32)
+        np.cumsum(np.bincount(parents, minlength=n), out=self.child_ptr[1:])
+        self.child_idx = non_roots[np.argsort(parents, kind='stable')].astype(np.int32)
     
-    def _calculate_subtree_commission(self, partner: OriginalPartner) -> float:
-        # Calculate subtree profit (profit from all descendants)
-        subtree_profit = 0.0
+    def calculate_daily_profits(self, target_date: Optional[datetime] = None) -> None:
+        if target_date is None:
+            target_date = datetime.now()
         
-        # First, recursively process all children (post-order)
-        for child in partner.children:
-            child_subtree_profit = self._calculate_subtree_commission(child)
-            subtree_profit += child_subtree_profit
+        days_in_month = _days_in_month(target_date.year, target_date.month)
         
-        # Add this partner's own profit to subtree total
-        subtree_profit += partner.daily_profit
+        self.daily_profit = self.monthly_revenue / days_in_month
+    
+    def calculate_commissions(self) -> Dict[str, float]:
+        # Calculate commissions using post-order traversal
+        subtree = np.zeros(self.daily_profit.size, dtype=np.float64)
+        _accumulate(self.post_order_idx, self.parent_idx, self.daily_profit, subtree)
         
-        # Calculate commission for this partner (5% of descendants' profits only)
-        descendants_profit = subtree_profit - partner.daily_profit
-        partner.total_commission = descendants_profit * self.COMMISSION_RATE
+        # Commission is 5% of descendants' profits only
+        self.total_commission = (subtree - self.daily_profit) * self.COMMISSION_RATE
         
-        return subtree_profit
+        # Format output with 2 decimal precision, rounding the whole array at once
+        rounded = _round_cents(self.total_commission)
+        return dict(zip(self.id_strs, rounded.tolist()))
 
 
 def test_original_vs_refactored():
     """Test original vs refactored implementation."""
     # Load data
-    with open('dataset.json', 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    if ORJSON_AVAILABLE:
+        with open('dataset.json', 'rb') as f:
+            data = orjson.loads(f.read())
+    else:
+        with open('dataset.json', 'r', encoding='utf-8') as f:
+            data = json.load(f)
     
     # Test original
     original_engine = OriginalCommissionEngine()
@@ -139,8 +263,12 @@ def test_original_vs_refactored():
     original_commissions = original_engine.calculate_commissions()
     
     # Save original results
-    with open('commissions_original_test.json', 'w', encoding='utf-8') as f:
-        json.dump(original_commissions, f, indent=2)
+    if ORJSON_AVAILABLE:
+        with open('commissions_original_test.json', 'wb') as f:
+            f.write(orjson.dumps(original_commissions, option=orjson.OPT_INDENT_2))
+    else:
+        with open('commissions_original_test.json', 'w', encoding='utf-8') as f:
+            json.dump(original_commissions, f, indent=2)
     
     print(f"Original engine processed {len(original_commissions)} partners")
     return original_commissions
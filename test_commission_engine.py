@@ -8,10 +8,23 @@ import pytest
 import json
 import tempfile
 import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict
 from datetime import datetime
 
+import numpy as np
+
+import commission_kernels
 from commission_engine import CommissionEngine, Partner
+from tree_components import (
+    CycleDetector, DailyProfitCalculator, PartnerTree, TreeValidator
+)
+from commission_components import CommissionCalculator, TreeStatistics
+from utils import FileUtils, MathUtils
+from config import Constants
+from file_processor import FileProcessor
+import main
 
 
 class TestPartner:
@@ -44,6 +57,53 @@ class TestPartner:
         )
         
         assert partner.parent_id == 1
+    
+    def test_partner_views_tree_arrays(self):
+        """Test bound partners read profits and commissions from tree arrays."""
+        data = [
+            {"id": 10, "parent_id": None, "name": "Root", "monthly_revenue": 3100},
+            {"id": 20, "parent_id": 10, "name": "Child", "monthly_revenue": 1550}
+        ]
+        
+        engine = CommissionEngine()
+        engine.load_partners(data)
+        engine.calculate_daily_profits(datetime(2024, 1, 15))
+        engine.calculate_commissions()
+        
+        tree = engine.tree
+        root = tree.get_partner(10)
+        child = tree.get_partner(20)
+        
+        assert tree.ids.tolist() == [10, 20]
+        assert tree.parent_idx.tolist() == [-1, root.index]
+        assert tree.order.tolist() == [root.index, child.index]
+        assert tree.child_offsets.tolist() == [0, 1, 1]
+        assert tree.child_offsets.dtype == tree.child_indices.dtype == np.int32
+        assert tree.daily_profit.dtype == np.float64
+        assert tree.child_indices.tolist() == [child.index]
+        assert root.daily_profit == 100.0
+        assert root.total_commission == tree.total_commission[root.index] == 2.5
+    
+    def test_partner_uses_slots(self):
+        """Test Partner stores attributes in slots rather than a __dict__."""
+        partner = Partner(partner_id=1)
+        
+        assert not hasattr(partner, '__dict__')
+        with pytest.raises(AttributeError):
+            partner.unknown_field = 1
+    
+    def test_shared_names_are_interned(self):
+        """Test partners loaded with equal names share one string object."""
+        data = [
+            {"id": 1, "parent_id": None, "name": "".join(["Team", " A"]), "monthly_revenue": 100},
+            {"id": 2, "parent_id": 1, "name": "".join(["Team", " A"]), "monthly_revenue": 100}
+        ]
+        assert data[0]["name"] is not data[1]["name"]
+        
+        engine = CommissionEngine()
+        engine.load_partners(data)
+        
+        assert engine.tree.partners[1].name is engine.tree.partners[2].name
 
 
 class TestCommissionEngine:
@@ -169,6 +229,19 @@ class TestCommissionEngine:
         with pytest.raises(ValueError, match="Cycle detected"):
             engine.load_partners(data)
     
+    def test_cycle_detector_walks_parent_chains(self):
+        """Test CycleDetector names the first partner whose ancestors loop."""
+        tree = PartnerTree()
+        # 1 <- 2 <- 3 is a valid chain; 4 -> 5 -> 6 -> 5 loops
+        for partner_id, parent_id in [(1, None), (2, 1), (3, 2), (4, 5), (5, 6), (6, 5)]:
+            tree.add_partner(Partner(partner_id, parent_id))
+        
+        with pytest.raises(ValueError, match="Cycle detected involving partner 4"):
+            CycleDetector().has_cycles(tree)
+        
+        del tree.partners[6]
+        assert CycleDetector().has_cycles(tree) is False
+    
     def test_nonexistent_parent(self):
         """Test error handling for nonexistent parent reference."""
         data = [
@@ -180,6 +253,35 @@ class TestCommissionEngine:
         with pytest.raises(ValueError, match="Parent 999 not found"):
             engine.load_partners(data)
     
+    def test_duplicate_partner_id(self):
+        """Test a repeated partner ID is rejected instead of overwriting the first."""
+        data = [
+            {"id": 1, "parent_id": None, "name": "Root", "monthly_revenue": 1000},
+            {"id": 1, "parent_id": None, "name": "Again", "monthly_revenue": 2000}
+        ]
+        
+        engine = CommissionEngine()
+        
+        with pytest.raises(ValueError, match="Duplicate partner ID 1 at index 1"):
+            engine.load_partners(data)
+    
+    def test_ids_beyond_int64(self):
+        """Test partner IDs that overflow int64 are kept exactly in the output."""
+        big_id = 2**64
+        data = [
+            {"id": big_id, "parent_id": None, "name": "Root", "monthly_revenue": 3100},
+            {"id": 2, "parent_id": big_id, "name": "Child", "monthly_revenue": 3100}
+        ]
+        
+        engine = CommissionEngine()
+        engine.load_partners(data)
+        engine.calculate_daily_profits(datetime(2024, 1, 15))
+        
+        assert engine.calculate_commissions() == {str(big_id): 5.0, "2": 0.0}
+        ids, commissions = engine.calculate_arrays(datetime(2024, 1, 15))
+        assert ids.tolist() == [big_id, 2]
+        assert commissions.tolist() == [5.0, 0.0]
+    
     def test_no_root_partners(self):
         """Test error handling when no root partners exist (all in cycle)."""
         data = [
@@ -264,6 +366,132 @@ class TestCommissionEngine:
         assert commissions["2"] == 40.0
         assert commissions["10"] == 0.0  # Leaf node
     
+    def test_very_deep_hierarchy_no_recursion_error(self):
+        """Test that chains deeper than the recursion limit are handled."""
+        depth = 5000
+        data = [
+            {
+                "id": i,
+                "parent_id": i - 1 if i > 1 else None,
+                "name": f"Partner{i}",
+                "monthly_revenue": 3100  # 100/day each
+            }
+            for i in range(1, depth + 1)
+        ]
+        
+        engine = CommissionEngine()
+        engine.load_partners(data)
+        engine.calculate_daily_profits(datetime(2024, 1, 15))
+        
+        commissions = engine.calculate_commissions()
+        
+        # Root gets 5% of all 4999 descendants: 0.05 * 4999 * 100 = 24995
+        assert commissions["1"] == 24995.0
+        assert commissions[str(depth)] == 0.0
+        assert engine.get_stats()['max_depth'] == depth - 1
+    
+    def test_fused_calculate_matches_two_step(self):
+        """Test the fused calculate() agrees with the two-step API."""
+        data = [
+            {"id": 1, "parent_id": None, "name": "Root", "monthly_revenue": 3100},
+            {"id": 2, "parent_id": 1, "name": "Child1", "monthly_revenue": 1023.33},
+            {"id": 3, "parent_id": 2, "name": "Grandchild", "monthly_revenue": 620},
+            {"id": 4, "parent_id": 1, "name": "Child2", "monthly_revenue": 930}
+        ]
+        target_date = datetime(2024, 4, 10)
+        
+        engine = CommissionEngine()
+        engine.load_partners(data)
+        engine.calculate_daily_profits(target_date)
+        expected = engine.calculate_commissions()
+        
+        fused_engine = CommissionEngine()
+        fused_engine.load_partners(data)
+        
+        assert fused_engine.calculate(target_date) == expected
+        assert fused_engine.tree.get_partner(3).daily_profit == engine.tree.get_partner(3).daily_profit
+    
+    def test_repeated_daily_runs_reuse_tree_layout(self):
+        """Test recalculating for other dates reuses the cached traversal order."""
+        data = [
+            {"id": 1, "parent_id": None, "name": "Root", "monthly_revenue": 3100},
+            {"id": 2, "parent_id": 1, "name": "Child", "monthly_revenue": 1550}
+        ]
+        
+        engine = CommissionEngine()
+        engine.load_partners(data)
+        order = engine.tree.order
+        parent_idx = engine.tree.parent_idx
+        
+        assert engine.calculate(datetime(2024, 1, 15))["1"] == 2.5  # 31 days
+        scratch = engine.commission_calculator._subtree_buf
+        assert engine.calculate(datetime(2024, 2, 15))["1"] == 2.67  # 29 days
+        assert engine.tree.order is order
+        assert engine.tree.parent_idx is parent_idx
+        assert engine.commission_calculator._subtree_buf is scratch
+        
+        daily_profit = engine.tree.daily_profit
+        engine.calculate_daily_profits(datetime(2024, 4, 15))
+        assert engine.tree.daily_profit is daily_profit
+        assert daily_profit.tolist() == [3100 / 30, 1550 / 30]
+    
+    def test_hand_built_tree_end_to_end(self):
+        """Test a tree assembled with add_partner/add_child is laid out on first use."""
+        tree = PartnerTree()
+        root = Partner(1, None, "Root", 3100)
+        child = Partner(2, 1, "Child", 3100)
+        tree.add_partner(root)
+        tree.add_partner(child)
+        root.add_child(child)
+        assert [p.id for p in tree.get_leaves()] == [2]
+        
+        TreeValidator().validate(tree)
+        DailyProfitCalculator().calculate_daily_profits(tree, datetime(2024, 1, 15))
+        commissions = CommissionCalculator().calculate_commissions(tree)
+        
+        assert (root.daily_profit, child.daily_profit) == (100.0, 100.0)
+        assert commissions == {"1": 5.0, "2": 0.0}
+        
+        # Statistics on a fresh hand-built tree see the same layout
+        fresh = PartnerTree()
+        fresh.add_partner(Partner(1, None, "Root", 3100))
+        fresh.add_partner(Partner(2, 1, "Child", 3100))
+        stats = TreeStatistics()
+        assert [p.id for p in fresh.get_leaves()] == [2]
+        assert stats.get_stats(fresh)['leaf_partners'] == 1
+        assert stats.get_stats(fresh)['max_depth'] == 1
+        assert stats.get_level_distribution(fresh) == {0: 1, 1: 1}
+        
+        # A partner added after a build needs its cycle check and layout redone
+        tree.add_partner(Partner(3, 3, "Loop", 100))
+        assert tree.is_acyclic is False
+        with pytest.raises(ValueError, match="Cycle detected involving partner 3"):
+            TreeValidator().validate(tree)
+    
+    def test_hand_built_tree_keeps_partner_values(self):
+        """Test laying out or extending a hand-built tree keeps values partners hold."""
+        tree = PartnerTree()
+        root = Partner(1, None, "Root", 3100)
+        child = Partner(2, 1, "Child", 3100)
+        tree.add_partner(root)
+        tree.add_partner(child)
+        root.add_child(child)
+        
+        # Profits assigned by hand before the arrays exist
+        child.daily_profit = 100.0
+        assert CommissionCalculator().calculate_commissions(tree) == {"1": 5.0, "2": 0.0}
+        
+        # Adding a partner after profits were calculated doesn't reset them
+        DailyProfitCalculator().calculate_daily_profits(tree, datetime(2024, 1, 15))
+        grandchild = Partner(3, 2, "Grandchild", 0)
+        tree.add_partner(grandchild)
+        child.add_child(grandchild)
+        
+        assert (root.daily_profit, child.daily_profit) == (100.0, 100.0)
+        assert CommissionCalculator().calculate_commissions(tree) == {
+            "1": 5.0, "2": 0.0, "3": 0.0
+        }
+    
     def test_file_processing(self):
         """Test end-to-end file processing functionality."""
         data = [
@@ -296,6 +524,135 @@ class TestCommissionEngine:
             os.unlink(input_filename)
             os.unlink(output_filename)
     
+    @pytest.mark.parametrize("child_id", [2, 10**400], ids=["small", "beyond-double"])
+    def test_load_partners_file_keeps_ids_beyond_64_bits(self, child_id, caplog):
+        """Test IDs a fast parser would read as floats are loaded exactly from a file."""
+        big_id = 2**64
+        data = [
+            {"id": big_id, "parent_id": None, "name": "Root", "monthly_revenue": 3100},
+            {"id": child_id, "parent_id": big_id, "name": "Child", "monthly_revenue": 1550}
+        ]
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            input_filename = os.path.join(tmp_dir, "in.json")
+            with open(input_filename, 'w') as f:
+                json.dump(data, f)
+            
+            engine = CommissionEngine()
+            assert engine.load_partners_file(input_filename) == 2
+            assert engine.tree.ids.tolist() == [big_id, child_id]
+            # A retried parse is not reported as a failure
+            assert not [r for r in caplog.records if r.levelname == "ERROR"]
+            
+            result = FileProcessor().validate_input_file(input_filename)
+            assert result['valid'] is True
+            assert result['partner_count'] == 2
+    
+    def test_process_file_with_ids_beyond_64_bits(self):
+        """Test end-to-end file processing writes IDs beyond 64 bits exactly."""
+        big_id = 2**64
+        data = [
+            {"id": big_id, "parent_id": None, "name": "Root", "monthly_revenue": 3100},
+            {"id": 2, "parent_id": big_id, "name": "Child", "monthly_revenue": 1550}
+        ]
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            input_filename = os.path.join(tmp_dir, "in.json")
+            output_filename = os.path.join(tmp_dir, "out.json")
+            with open(input_filename, 'w') as f:
+                json.dump(data, f)
+            
+            CommissionEngine().process_file(input_filename, output_filename)
+            
+            with open(output_filename, 'r') as f:
+                result = json.load(f)
+            assert list(result) == [str(big_id), "2"]
+            assert result["2"] == 0.0
+    
+    def test_file_processor_reports_calculation_date(self):
+        """Test FileProcessor resolves the date once and reports the one it used."""
+        data = [
+            {"id": 1, "parent_id": None, "name": "Root", "monthly_revenue": 3100},
+            {"id": 2, "parent_id": 1, "name": "Child", "monthly_revenue": 1550}
+        ]
+        input_filename = FileUtils.create_temp_json(data)
+        output_filename = input_filename + ".out"
+        
+        try:
+            processor = FileProcessor()
+            result = processor.process_commission_file(
+                input_filename, output_filename, target_date=datetime(2024, 1, 15)
+            )
+            assert result['processing_date'] == "2024-01-15T00:00:00"
+            assert result['commissions']["1"] == 2.5
+            
+            result = processor.process_commission_file(input_filename, output_filename)
+            assert result['processing_date'] is not None
+        finally:
+            os.unlink(input_filename)
+            os.unlink(output_filename)
+    
+    def test_file_processor_process_many(self):
+        """Test batch processing writes every output file with its own results."""
+        first = FileUtils.create_temp_json([
+            {"id": 1, "parent_id": None, "name": "Root", "monthly_revenue": 3100},
+            {"id": 2, "parent_id": 1, "name": "Child", "monthly_revenue": 1550}
+        ])
+        second = FileUtils.create_temp_json([
+            {"id": 7, "parent_id": None, "name": "Root", "monthly_revenue": 0},
+            {"id": 8, "parent_id": 7, "name": "Child", "monthly_revenue": 3100}
+        ])
+        jobs = [(first, first + ".out"), (second, second + ".out")]
+        
+        try:
+            results = FileProcessor().process_many(jobs, target_date=datetime(2024, 1, 15))
+            
+            assert [r['commissions'] for r in results] == [
+                {"1": 2.5, "2": 0.0}, {"7": 5.0, "8": 0.0}
+            ]
+            assert FileUtils.read_json(first + ".out") == {"1": 2.5, "2": 0.0}
+            assert FileUtils.read_json(second + ".out") == {"7": 5.0, "8": 0.0}
+        finally:
+            for input_file, output_file in jobs:
+                os.unlink(input_file)
+                os.unlink(output_file)
+    
+    def test_validate_input_file_skips_stats_when_not_requested(self):
+        """Test validation only computes statistics when asked to."""
+        input_filename = FileUtils.create_temp_json([
+            {"id": 1, "parent_id": None, "name": "Root", "monthly_revenue": 1000}
+        ])
+        
+        try:
+            processor = FileProcessor()
+            quiet = processor.validate_input_file(input_filename, include_stats=False)
+            verbose = processor.validate_input_file(input_filename)
+            
+            assert quiet['valid'] and 'statistics' not in quiet
+            assert verbose['statistics']['total_partners'] == 1
+        finally:
+            os.unlink(input_filename)
+    
+    def test_leaves_follow_tree_layout(self):
+        """Test leaves are the partners without children in the CSR layout."""
+        data = [
+            {"id": 3, "parent_id": 1, "name": "Child", "monthly_revenue": 100},
+            {"id": 1, "parent_id": None, "name": "Root", "monthly_revenue": 100},
+            {"id": 4, "parent_id": 3, "name": "Grandchild", "monthly_revenue": 100},
+            {"id": 2, "parent_id": 1, "name": "Child", "monthly_revenue": 100}
+        ]
+        
+        engine = CommissionEngine()
+        engine.load_partners(data)
+        
+        assert [p.id for p in engine.tree.get_leaves()] == [4, 2]
+        
+        root = engine.tree.partners[1]
+        children = engine.tree.children_of(root.index)
+        assert engine.tree.ids[children].tolist() == [p.id for p in root.children] == [3, 2]
+        assert engine.tree.children_of(engine.tree.partners[4].index).size == 0
+        assert engine.get_stats()['leaf_partners'] == 2
+    
     def test_stats_generation(self):
         """Test network statistics generation."""
         data = [
@@ -314,6 +671,252 @@ class TestCommissionEngine:
         assert stats['root_partners'] == 1
         assert stats['leaf_partners'] == 2  # Child2 and Grandchild
         assert stats['max_depth'] == 2  # Root -> Child -> Grandchild
+        assert engine.get_level_distribution() == {0: 1, 1: 2, 2: 1}
+        
+        # Stats are memoized on the tree; callers get independent copies
+        stats['total_partners'] = 0
+        assert engine.tree._stats_cache is not None
+        assert engine.get_stats()['total_partners'] == 4
+        
+        metrics = engine.get_performance_metrics()
+        assert engine.tree._memory_bytes_cache is not None
+        assert engine.get_performance_metrics() == metrics
+        assert metrics['memory_per_partner_kb'] > 0
+        assert metrics['estimated_memory_kb'] == pytest.approx(metrics['memory_per_partner_kb'] * 4)
+
+
+class TestCommissionKernels:
+    """Test compiled commission kernels against the pure-Python reference."""
+    
+    def test_commission_scan_matches_python_fallback(self):
+        """Test the selected kernel agrees with the pure-Python scan."""
+        order = np.array([0, 2, 1, 3], dtype=np.int32)
+        parent_idx = np.array([-1, 0, 0, 2], dtype=np.int32)
+        daily_profit = np.array([100.0, 50.0, 30.0, 20.0])
+        
+        expected = commission_kernels._commission_scan_python(
+            order, parent_idx, daily_profit, 0.05, np.zeros(4)
+        )
+        result = commission_kernels.commission_scan(order, parent_idx, daily_profit, 0.05)
+        
+        assert expected.tolist() == [5.0, 0.0, 1.0, 0.0]
+        assert result.tolist() == expected.tolist()
+    
+    def test_python_pipeline_matches_python_scan(self):
+        """Test the pure-Python fused pipeline agrees with the two-step scan."""
+        order = np.array([0, 2, 1, 3], dtype=np.int32)
+        parent_idx = np.array([-1, 0, 0, 2], dtype=np.int32)
+        monthly_revenue = np.array([3100.0, 1550.0, 930.0, 620.0])
+        daily_profit = np.zeros(4)
+        
+        commissions = commission_kernels._commission_pipeline_python(
+            order, parent_idx, monthly_revenue, 31, 0.05, daily_profit, np.zeros(4)
+        )
+        expected = commission_kernels._commission_scan_python(
+            order, parent_idx, monthly_revenue / 31, 0.05, np.zeros(4)
+        )
+        
+        assert daily_profit.tolist() == (monthly_revenue / 31).tolist()
+        assert commissions.tolist() == expected.tolist() == [5.0, 0.0, 1.0, 0.0]
+    
+    @pytest.mark.skipif(not commission_kernels.CYTHON_AVAILABLE, reason="Cython kernels not built")
+    def test_cython_scan_matches_python_fallback(self):
+        """Test the Cython scan agrees with the pure-Python scan."""
+        order = np.array([0, 2, 1, 3], dtype=np.int32)
+        parent_idx = np.array([-1, 0, 0, 2], dtype=np.int32)
+        daily_profit = np.array([100.0, 50.0, 30.0, 20.0])
+        
+        expected = commission_kernels._commission_scan_python(
+            order, parent_idx, daily_profit, 0.05, np.zeros(4)
+        )
+        result = commission_kernels.commission_kernels_cy.commission_scan(
+            order, parent_idx, daily_profit, 0.05, np.zeros(4)
+        )
+        
+        assert result.tolist() == expected.tolist()
+    
+    @pytest.mark.skipif(
+        not (commission_kernels.NUMBA_AVAILABLE or commission_kernels.CYTHON_AVAILABLE),
+        reason="No compiled kernels available"
+    )
+    def test_parallel_scan_matches_serial(self):
+        """Test per-root parallel scan agrees with the serial scan on a forest."""
+        # Two roots (0 and 3), each subtree contiguous in the order
+        order = np.array([0, 2, 1, 3, 4], dtype=np.int32)
+        root_offsets = np.array([0, 3, 5], dtype=np.int64)
+        parent_idx = np.array([-1, 0, 0, -1, 3], dtype=np.int32)
+        daily_profit = np.array([100.0, 50.0, 30.0, 40.0, 20.0])
+        
+        serial = commission_kernels._commission_scan(
+            order, parent_idx, daily_profit, 0.05, np.zeros(5)
+        )
+        parallel = commission_kernels._commission_scan_parallel(
+            order, root_offsets, parent_idx, daily_profit, 0.05, np.zeros(5)
+        )
+        
+        assert parallel.tolist() == serial.tolist()
+    
+    def test_worker_threads_use_serial_numba_kernels(self, monkeypatch):
+        """Test off-main-thread callers skip prange kernels and get the same results."""
+        monkeypatch.setattr(Constants, "PARALLEL_MIN_PARTNERS", 2)
+        order = np.array([0, 2, 1, 3, 4], dtype=np.int32)
+        root_offsets = np.array([0, 3, 5], dtype=np.int64)
+        parent_idx = np.array([-1, 0, 0, -1, 3], dtype=np.int32)
+        daily_profit = np.array([100.0, 50.0, 30.0, 40.0, 20.0])
+        
+        def run():
+            return (commission_kernels._should_parallelize(root_offsets, order.size),
+                    commission_kernels.commission_scan(order, parent_idx, daily_profit,
+                                                       0.05, root_offsets).tolist())
+        
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            parallel, result = pool.submit(run).result()
+        
+        expected = commission_kernels._commission_scan_python(
+            order, parent_idx, daily_profit, 0.05, np.zeros(5)
+        )
+        assert result == expected.tolist()
+        assert parallel is (commission_kernels.CYTHON_AVAILABLE
+                            and not commission_kernels.NUMBA_AVAILABLE)
+    
+    def test_root_spans_cover_order_on_root_boundaries(self):
+        """Test root subtrees are grouped into balanced spans without splitting a root."""
+        root_offsets = np.array([0, 4, 5, 6, 10], dtype=np.int64)
+        
+        spans = commission_kernels._root_spans(root_offsets, 2)
+        
+        assert spans == [(0, 5), (5, 10)]
+        assert commission_kernels._root_spans(root_offsets, 1) == [(0, 10)]
+    
+    def test_find_cycle_start(self):
+        """Test pointer doubling flags the first partner whose ancestors loop."""
+        # 0 <- 1 <- 2 is a chain; 3 hangs off the 4 <-> 5 cycle; 6 has a missing parent
+        parent_idx = np.array([-1, 0, 1, 4, 5, 4, -1])
+        
+        assert commission_kernels.find_cycle_start(parent_idx) == 3
+        assert commission_kernels.find_cycle_start(np.array([-1, 0, 1, 2])) == -1
+        assert commission_kernels.find_cycle_start(np.array([0])) == 0
+        
+        # The selected kernel and the NumPy fallback name the same partner
+        rng = np.random.default_rng(Constants.BENCHMARK_SEED)
+        for _ in range(50):
+            parent_idx = rng.integers(-1, 20, size=20)
+            assert (commission_kernels.find_cycle_start(parent_idx)
+                    == commission_kernels._find_cycle_start_numpy(parent_idx))
+    
+    def test_find_cycle_start_threaded(self, monkeypatch):
+        """Test chunked gathers on a thread pool agree with the serial pass."""
+        monkeypatch.setattr(Constants, "PARALLEL_MIN_PARTNERS", 2)
+        monkeypatch.setattr(commission_kernels.os, "cpu_count", lambda: 3)
+        parent_idx = np.array([-1, 0, 1, 4, 5, 4, -1])
+        
+        assert commission_kernels._find_cycle_start_numpy(parent_idx) == 3
+        assert commission_kernels._find_cycle_start_numpy(np.arange(-1, 9)) == -1
+    
+    def test_compute_depths_matches_python_fallback(self):
+        """Test the selected depth kernel agrees with the pure-Python pass."""
+        # Root 0 -> 2 -> 1 -> 4, and a second root 3
+        order = np.array([0, 2, 1, 4, 3], dtype=np.int32)
+        parent_idx = np.array([-1, 2, 0, -1, 1], dtype=np.int32)
+        
+        expected = commission_kernels._compute_depths_python(order, parent_idx)
+        result = commission_kernels.compute_depths(order, parent_idx)
+        
+        assert expected.tolist() == [0, 2, 1, 0, 3]
+        assert result.tolist() == expected.tolist()
+        assert result.dtype == expected.dtype == np.int32
+    
+    @pytest.mark.skipif(not commission_kernels.NUMBA_AVAILABLE, reason="Numba not installed")
+    def test_warm_up_compiles_cycle_check_for_intp(self):
+        """Test warm-up covers the intp parent links CycleDetector passes."""
+        commission_kernels.warm_up()
+        
+        signatures = commission_kernels.find_cycle_start.signatures
+        assert any(str(sig[0].dtype) == np.dtype(np.intp).name for sig in signatures)
+    
+    def test_topological_order_matches_python_fallback(self):
+        """Test the CSR topological order keeps roots contiguous and reverses siblings."""
+        # Root 0 has children 1 and 2; root 3 has child 4
+        roots = np.array([0, 3], dtype=np.int32)
+        child_offsets = np.array([0, 2, 2, 2, 3, 3], dtype=np.int32)
+        child_indices = np.array([1, 2, 4], dtype=np.int32)
+        
+        expected = commission_kernels._topological_order_python(roots, child_offsets, child_indices)
+        order, root_offsets = commission_kernels.topological_order(roots, child_offsets, child_indices)
+        
+        assert expected[0].tolist() == [0, 2, 1, 3, 4]
+        assert expected[1].tolist() == [0, 3, 5]
+        assert order.tolist() == expected[0].tolist()
+        assert root_offsets.tolist() == expected[1].tolist()
+
+
+class TestFileUtils:
+    """Test JSON file helpers."""
+    
+    def test_json_round_trip(self):
+        """Test written JSON reads back unchanged with stdlib-compatible layout."""
+        data = {"1": 1457.34, "2": 0.0}
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filepath = os.path.join(tmp_dir, "out.json")
+            FileUtils.write_json(filepath, data)
+            
+            with open(filepath, 'r') as f:
+                assert f.read() == json.dumps(data, indent=2)
+            assert FileUtils.read_json(filepath) == data
+    
+    def test_read_invalid_json(self):
+        """Test invalid JSON surfaces as json.JSONDecodeError with file context."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filepath = os.path.join(tmp_dir, "bad.json")
+            with open(filepath, 'w') as f:
+                f.write("{not json")
+            
+            with pytest.raises(json.JSONDecodeError, match="Invalid JSON format"):
+                FileUtils.read_json(filepath)
+    
+    def test_read_json_memory_mapped(self, monkeypatch):
+        """Test files above the mmap threshold parse the same, errors included."""
+        monkeypatch.setattr(Constants, "MMAP_MIN_BYTES", 0)
+        data = [{"id": 1, "parent_id": None, "name": "Root", "monthly_revenue": 1000}]
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filepath = os.path.join(tmp_dir, "in.json")
+            FileUtils.write_json(filepath, data)
+            assert FileUtils.read_json(filepath) == data
+            
+            with open(filepath, 'w') as f:
+                f.write("{not json")
+            with pytest.raises(json.JSONDecodeError, match="Invalid JSON format"):
+                FileUtils.read_json(filepath)
+
+
+class TestMathUtils:
+    """Test numeric helpers."""
+    
+    def test_round_currency_array_matches_scalar_rounding(self):
+        """Test batch rounding agrees with round() on half-cent ties."""
+        values = np.array([2.675, 0.005, 0.015, 0.025, 1.6505, 12363.085, 33.3149])
+        
+        rounded = MathUtils.round_currency_array(values)
+        
+        assert rounded.tolist() == [MathUtils.round_currency(v) for v in values.tolist()]
+
+
+
+class TestMain:
+    """Test the command-line entry point."""
+    
+    @pytest.mark.skipif(
+        not (3, 10) <= sys.version_info[:2] < (3, 13),
+        reason="USAGE follows the argparse help layout of Python 3.10-3.12"
+    )
+    def test_fast_path_usage_matches_parser_help(self, monkeypatch):
+        """Test the hand-written fast-path USAGE matches argparse's --help."""
+        monkeypatch.setattr(sys, "argv", ["main.py"])
+        monkeypatch.setenv("COLUMNS", "80")
+        
+        assert main.build_parser().format_help() == main.USAGE
 
 
 if __name__ == "__main__":
@@ -2,16 +2,32 @@
 Tree building and validation components for MLM network.
 """
 
-from typing import Dict, List, Set, Optional
+from typing import Dict, List, Optional
+from collections import defaultdict
 from datetime import datetime
-import calendar
+import sys
 
+import numpy as np
+
+import commission_kernels
 from config import Constants, ErrorMessages
-from utils import ValidationUtils, MathUtils
+from utils import ValidationUtils
 
 
 class Partner:
-    """Represents a partner in the MLM network."""
+    """
+    Represents a partner in the MLM network.
+    
+    Once added to a built PartnerTree, ``daily_profit`` and ``total_commission``
+    become thin views over the tree's Structure-of-Arrays storage.
+    
+    Partners are created once per network member, so ``__slots__`` replaces
+    the per-instance ``__dict__`` to shrink each object and speed up
+    attribute access.
+    """
+    
+    __slots__ = ('id', 'parent_id', 'name', 'monthly_revenue', 'children',
+                 'index', '_tree', '_daily_profit', '_total_commission')
     
     def __init__(self, partner_id: int, parent_id: Optional[int] = None, 
                  name: str = '', monthly_revenue: float = 0.0):
@@ -29,16 +45,53 @@ class Partner:
         self.name = name
         self.monthly_revenue = monthly_revenue
         self.children: List['Partner'] = []
-        self.daily_profit: float = 0.0
-        self.total_commission: float = 0.0
+        self.index: int = -1
+        self._tree: Optional['PartnerTree'] = None
+        self._daily_profit: float = 0.0
+        self._total_commission: float = 0.0
+    
+    @property
+    def daily_profit(self) -> float:
+        """Daily profit, read from the owning tree's arrays once bound."""
+        if self.index < 0:
+            return self._daily_profit
+        return float(self._tree.daily_profit[self.index])
+    
+    @daily_profit.setter
+    def daily_profit(self, value: float) -> None:
+        if self.index < 0:
+            self._daily_profit = value
+        else:
+            self._tree.daily_profit[self.index] = value
+    
+    @property
+    def total_commission(self) -> float:
+        """Total commission, read from the owning tree's arrays once bound."""
+        if self.index < 0:
+            return self._total_commission
+        return float(self._tree.total_commission[self.index])
+    
+    @total_commission.setter
+    def total_commission(self, value: float) -> None:
+        if self.index < 0:
+            self._total_commission = value
+        else:
+            self._tree.total_commission[self.index] = value
+    
+    def bind(self, tree: 'PartnerTree', index: int) -> None:
+        """Attach partner to a tree's array storage at the given dense index."""
+        self._tree = tree
+        self.index = index
     
     def add_child(self, child: 'Partner') -> None:
         """Add a child partner."""
         self.children.append(child)
+        if self._tree is not None:
+            self._tree._arrays_stale = True
     
     def is_leaf(self) -> bool:
         """Check if partner is a leaf node (no children)."""
-        return len(self.children) == 0
+        return not self.children
     
     def is_root(self) -> bool:
         """Check if partner is a root node (no parent)."""
@@ -46,19 +99,90 @@ class Partner:
 
 
 class PartnerTree:
-    """Represents the MLM partner tree structure."""
+    """
+    Represents the MLM partner tree structure.
+    
+    Besides the Partner objects, the tree keeps Structure-of-Arrays storage
+    indexed by a dense partner index (``Partner.index``):
+    
+    - ids: partner IDs (int64; object dtype if any ID overflows int64),
+      with ``id_strs`` holding their string keys
+    - monthly_revenue, daily_profit, total_commission: float64 values
+    - parent_idx: dense index of each partner's parent, -1 for roots (int32)
+    - order: topological order, parents before children (int32), grouped
+      by root with ``root_offsets`` (int64) delimiting each root's slice
+    - child_offsets, child_indices: CSR children adjacency (int32)
+    
+    Index arrays use int32 to halve memory traffic in the traversal kernels.
+    Money values stay float64: float32 accumulation over large networks
+    drifts by more than a cent and would change published commissions.
+    
+    ``is_acyclic`` is set by TreeBuilder once every partner was reached from
+    a root while building ``order``.
+    
+    TreeBuilder lays the arrays out at build time. Trees assembled by hand
+    with ``add_partner`` are laid out on first use by ``ensure_arrays``.
+    """
     
     def __init__(self):
         """Initialize empty partner tree."""
         self.partners: Dict[int, Partner] = {}
         self.roots: List[Partner] = []
+        self.ids: np.ndarray = np.empty(0, dtype=np.int64)
+        self.id_strs: List[str] = []
+        self.monthly_revenue: np.ndarray = np.empty(0, dtype=np.float64)
+        self.daily_profit: np.ndarray = np.empty(0, dtype=np.float64)
+        self.total_commission: np.ndarray = np.empty(0, dtype=np.float64)
+        self.parent_idx: np.ndarray = np.empty(0, dtype=np.int32)
+        self.order: np.ndarray = np.empty(0, dtype=np.int32)
+        self.root_offsets: np.ndarray = np.zeros(1, dtype=np.int64)
+        self.child_offsets: np.ndarray = np.zeros(1, dtype=np.int32)
+        self.child_indices: np.ndarray = np.empty(0, dtype=np.int32)
+        self._depths: Optional[np.ndarray] = None
+        self._stats_cache: Optional[Dict[str, int]] = None
+        self._level_dist_cache: Optional[Dict[int, int]] = None
+        self._memory_bytes_cache: Optional[int] = None
+        self.is_acyclic: bool = False
+        self._arrays_stale: bool = False
     
     def add_partner(self, partner: Partner) -> None:
-        """Add partner to the tree."""
+        """
+        Add partner to the tree, invalidating cached statistics.
+        
+        The array storage and the acyclicity proof no longer cover the new
+        partner, so both are rebuilt on next use. Profits and commissions
+        already held by partners carry over into the rebuilt arrays.
+        """
+        self._invalidate_caches()
+        self._arrays_stale = True
+        self.is_acyclic = False
+        # Record ownership so add_child marks the layout stale; the partner
+        # holds its own values until the arrays are rebuilt
+        partner._daily_profit = partner.daily_profit
+        partner._total_commission = partner.total_commission
+        partner._tree = self
+        partner.index = -1
         self.partners[partner.id] = partner
-        if partner.is_root():
+        if partner.parent_id is None:
             self.roots.append(partner)
     
+    def _invalidate_caches(self) -> None:
+        """Drop derived data that depends on the tree's structure."""
+        self._depths = None
+        self._stats_cache = None
+        self._level_dist_cache = None
+        self._memory_bytes_cache = None
+    
+    def ensure_arrays(self) -> None:
+        """
+        Build the array storage if partners were added since it was last built.
+        
+        Raises:
+            ValueError: If a parent is missing or the structure has a cycle
+        """
+        if self._arrays_stale:
+            TreeBuilder()._build_arrays(self, keep_values=True)
+    
     def get_partner(self, partner_id: int) -> Optional[Partner]:
         """Get partner by ID."""
         return self.partners.get(partner_id)
@@ -72,12 +196,74 @@ class PartnerTree:
         return self.roots
     
     def get_leaves(self) -> List[Partner]:
-        """Get all leaf partners."""
-        return [p for p in self.partners.values() if p.is_leaf()]
+        """
+        Get all leaf partners, in insertion order.
+        
+        Leaves are read from the CSR layout, the same source as the leaf
+        count in the statistics, rather than kept in a separate index.
+        """
+        self.ensure_arrays()
+        partners = self.get_all_partners()
+        leaf_indices = np.flatnonzero(np.diff(self.child_offsets) == 0)
+        return [partners[i] for i in leaf_indices.tolist()]
+    
+    def children_of(self, index: int) -> np.ndarray:
+        """
+        Get the dense indices of a partner's children as a view into the CSR arena.
+        
+        Args:
+            index: Dense index of the partner (``Partner.index``)
+            
+        Returns:
+            int32 array of child indices, in the same order as ``Partner.children``
+        """
+        return self.child_indices[self.child_offsets[index]:self.child_offsets[index + 1]]
     
     def size(self) -> int:
         """Get total number of partners."""
         return len(self.partners)
+    
+    def get_depths(self) -> np.ndarray:
+        """
+        Get each partner's depth (roots are level 0), indexed by dense index.
+        
+        Computed lazily with one forward pass over the topological order and
+        cached, since the tree is not mutated after it is built.
+        """
+        self.ensure_arrays()
+        if self._depths is None:
+            self._depths = commission_kernels.compute_depths(self.order, self.parent_idx)
+        return self._depths
+    
+    def memory_usage_bytes(self) -> int:
+        """
+        Estimate memory held by partner objects and the array storage.
+        
+        Counts each Partner object with its children list plus all array
+        buffers; names and other shared Python objects are not included.
+        The walk over partners is memoized until the tree changes.
+        """
+        self.ensure_arrays()
+        if self._memory_bytes_cache is not None:
+            return self._memory_bytes_cache
+        
+        object_bytes = sum(
+            sys.getsizeof(p) + sys.getsizeof(p.children) for p in self.partners.values()
+        )
+        array_bytes = sum(
+            array.nbytes for array in (
+                self.ids, self.monthly_revenue, self.daily_profit, self.total_commission,
+                self.parent_idx, self.order, self.root_offsets,
+                self.child_offsets, self.child_indices
+            )
+        )
+        self._memory_bytes_cache = object_bytes + array_bytes
+        return self._memory_bytes_cache
+
+
+def _intern_name(name: object) -> object:
+    """Intern string names; other values pass through unchanged."""
+    return sys.intern(name) if type(name) is str else name
 
 
 class TreeBuilder:
@@ -107,45 +293,162 @@ class TreeBuilder:
         # Build parent-child relationships
         self._build_relationships(tree)
         
+        # Lay out partner data as parallel arrays for vectorized processing
+        self._build_arrays(tree)
+        
         return tree
     
     def _create_partners(self, data: List[Dict], tree: PartnerTree) -> None:
-        """Create partner objects from data."""
-        for item in data:
-            partner = Partner(
-                partner_id=item['id'],
-                parent_id=item.get('parent_id'),
-                name=item.get('name', ''),
-                monthly_revenue=item['monthly_revenue']
-            )
-            tree.add_partner(partner)
+        """
+        Create partner objects from data.
+        
+        Partners are built in one comprehension and installed on the tree
+        in bulk, rather than one ``add_partner`` call each.
+        
+        Names are interned so partners sharing a name (often empty) share
+        one string object. Compare names with ``==``; identity is an
+        implementation detail.
+        """
+        partners = [
+            Partner(item['id'], item.get('parent_id'),
+                    _intern_name(item.get('name', '')), item['monthly_revenue'])
+            for item in data
+        ]
+        
+        tree.partners = {partner.id: partner for partner in partners}
+        tree.roots = [partner for partner in partners if partner.parent_id is None]
+        tree._invalidate_caches()
     
     def _build_relationships(self, tree: PartnerTree) -> None:
-        """Build parent-child relationships in the tree."""
-        for partner in tree.get_all_partners():
-            if not partner.is_root():
-                if partner.parent_id is None:
-                    continue  # Skip if parent_id is None
-                    
-                parent = tree.get_partner(partner.parent_id)
-                if parent is None:
-                    raise ValueError(ErrorMessages.PARENT_NOT_FOUND.format(
-                        parent_id=partner.parent_id, partner_id=partner.id
-                    ))
-                parent.add_child(partner)
+        """
+        Build parent-child relationships in the tree.
+        
+        Children are grouped by parent ID in a single pass, then each group is
+        attached to its parent with one lookup, keeping siblings in input order.
+        """
+        children_by_parent: Dict[int, List[Partner]] = defaultdict(list)
+        for partner in tree.partners.values():
+            if partner.parent_id is not None:
+                children_by_parent[partner.parent_id].append(partner)
+        
+        for parent_id, children in children_by_parent.items():
+            parent = tree.partners.get(parent_id)
+            if parent is None:
+                raise ValueError(ErrorMessages.parent_not_found(
+                    parent_id=parent_id, partner_id=children[0].id
+                ))
+            parent.children = children
+    
+    def _build_arrays(self, tree: PartnerTree, keep_values: bool = False) -> None:
+        """
+        Build Structure-of-Arrays storage and bind partners to it.
+        
+        Args:
+            tree: Tree to lay out
+            keep_values: Seed profits and commissions from the partners'
+                current values instead of zeros, for trees that already ran
+                calculations or were assigned values by hand
+        """
+        partners = tree.get_all_partners()
+        n = len(partners)
+        
+        try:
+            tree.ids = np.fromiter((p.id for p in partners), dtype=np.int64, count=n)
+        except OverflowError:
+            # IDs beyond int64 are valid input; keep them as exact Python ints
+            tree.ids = np.array([p.id for p in partners], dtype=object)
+        tree.id_strs = [str(p.id) for p in partners]
+        tree.monthly_revenue = np.fromiter(
+            (p.monthly_revenue for p in partners), dtype=np.float64, count=n
+        )
+        if keep_values:
+            # Read before rebinding, while bound partners still view the old arrays
+            tree.daily_profit = np.fromiter(
+                (p.daily_profit for p in partners), dtype=np.float64, count=n
+            )
+            tree.total_commission = np.fromiter(
+                (p.total_commission for p in partners), dtype=np.float64, count=n
+            )
+        else:
+            tree.daily_profit = np.zeros(n, dtype=np.float64)
+            tree.total_commission = np.zeros(n, dtype=np.float64)
+        
+        for index, partner in enumerate(partners):
+            partner.bind(tree, index)
+        
+        try:
+            tree.parent_idx = np.fromiter(
+                (tree.partners[p.parent_id].index if p.parent_id is not None else -1
+                 for p in partners),
+                dtype=np.int32, count=n
+            )
+        except KeyError as e:
+            # Only reachable for hand-built trees; TreeBuilder checks parents first
+            missing = e.args[0]
+            orphan = next(p for p in partners if p.parent_id == missing)
+            raise ValueError(ErrorMessages.parent_not_found(
+                parent_id=missing, partner_id=orphan.id
+            )) from None
+        self._build_child_csr(tree)
+        
+        roots = np.flatnonzero(tree.parent_idx < 0).astype(np.int32)
+        tree.order, tree.root_offsets = commission_kernels.topological_order(
+            roots, tree.child_offsets, tree.child_indices
+        )
+        self._check_all_reachable(tree)
+        tree._arrays_stale = False
+    
+    def _build_child_csr(self, tree: PartnerTree) -> None:
+        """
+        Lay out parent -> children adjacency as CSR arrays.
+        
+        Children of partner ``i`` are
+        ``child_indices[child_offsets[i]:child_offsets[i + 1]]``, in the same
+        order as ``Partner.children``. Contiguous integer slices replace
+        per-partner lists of object references for traversals.
+        """
+        n = tree.parent_idx.size
+        non_roots = np.flatnonzero(tree.parent_idx >= 0)
+        parents = tree.parent_idx[non_roots]
+        
+        tree.child_offsets = np.zeros(n + 1, dtype=np.int32)
+        np.cumsum(np.bincount(parents, minlength=n), out=tree.child_offsets[1:])
+        
+        # Stable sort keeps siblings in input order
+        tree.child_indices = non_roots[np.argsort(parents, kind='stable')].astype(np.int32)
+    
+    def _check_all_reachable(self, tree: PartnerTree) -> None:
+        """
+        Detect cycles as a by-product of the topological order.
+        
+        Every partner is reachable from a root unless its ancestor chain runs
+        into a cycle, so a short order means the structure is cyclic.
+        
+        Raises:
+            ValueError: If any partner is unreachable from the roots
+        """
+        n = tree.ids.size
+        if tree.order.size != n:
+            unreachable = np.ones(n, dtype=bool)
+            unreachable[tree.order] = False
+            first = int(np.flatnonzero(unreachable)[0])
+            raise ValueError(ErrorMessages.cycle_detected(
+                partner_id=int(tree.ids[first])
+            ))
+        
+        tree.is_acyclic = True
 
 
 class CycleDetector:
-    """Detects cycles in partner network using DFS."""
-    
-    def __init__(self):
-        """Initialize cycle detector."""
-        self.visited: Set[int] = set()
-        self.rec_stack: Set[int] = set()
+    """Detects cycles in partner network with vectorized pointer doubling."""
     
     def has_cycles(self, tree: PartnerTree) -> bool:
         """
-        Check if tree contains cycles by following parent-child relationships.
+        Check if tree contains cycles by following parent links.
+        
+        Parent links are laid out as a dense index array and resolved for
+        every partner at once with O(log n) NumPy gathers, instead of walking
+        each ancestor chain in Python.
         
         Args:
             tree: PartnerTree to check
@@ -156,49 +459,18 @@ class CycleDetector:
         Raises:
             ValueError: If a cycle is found (with details)
         """
-        self.visited.clear()
-        self.rec_stack.clear()
+        partners = tree.get_all_partners()
+        index_of = {partner.id: i for i, partner in enumerate(partners)}
+        parent_idx = np.fromiter(
+            (index_of.get(partner.parent_id, -1) for partner in partners),
+            dtype=np.intp, count=len(partners)
+        )
         
-        # Check each partner for cycles by following parent links
-        for partner in tree.get_all_partners():
-            if partner.id not in self.visited:
-                if self._has_cycle_from_partner(partner, tree):
-                    raise ValueError(ErrorMessages.CYCLE_DETECTED.format(
-                        partner_id=partner.id
-                    ))
-        
-        return False
-    
-    def _has_cycle_from_partner(self, partner: Partner, tree: PartnerTree) -> bool:
-        """
-        Check for cycle starting from a specific partner by following parent links.
-        
-        Args:
-            partner: Partner to start cycle detection from
-            tree: PartnerTree containing all partners
-            
-        Returns:
-            True if cycle is detected, False otherwise
-        """
-        visited_in_path: Set[int] = set()
-        current = partner
-        
-        while current is not None:
-            if current.id in visited_in_path:
-                # Found a cycle
-                return True
-            
-            visited_in_path.add(current.id)
-            self.visited.add(current.id)
-            
-            # Follow parent link
-            if current.parent_id is None:
-                break
-                
-            current = tree.get_partner(current.parent_id)
-            if current is None:
-                # Parent not found - this is a structural error but not a cycle
-                break
+        start = commission_kernels.find_cycle_start(parent_idx)
+        if start >= 0:
+            raise ValueError(ErrorMessages.cycle_detected(
+                partner_id=partners[start].id
+            ))
         
         return False
 
@@ -230,8 +502,20 @@ class TreeValidator:
             raise ValueError(ErrorMessages.NO_ROOT_PARTNERS)
     
     def _validate_no_cycles(self, tree: PartnerTree) -> None:
-        """Ensure tree has no cycles."""
-        self.cycle_detector.has_cycles(tree)
+        """Ensure tree has no cycles, unless TreeBuilder already proved it."""
+        if not tree.is_acyclic:
+            self.cycle_detector.has_cycles(tree)
+
+
+# Days per month in a common year, January first
+_MONTH_DAYS = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+
+def _days_in_month(year: int, month: int) -> int:
+    """Table lookup equivalent to ``calendar.monthrange(year, month)[1]``."""
+    if month == 2 and year % 4 == 0 and (year % 100 != 0 or year % 400 == 0):
+        return 29
+    return _MONTH_DAYS[month - 1]
 
 
 class DailyProfitCalculator:
@@ -246,6 +530,29 @@ class DailyProfitCalculator:
             tree: PartnerTree to process
             target_date: Date for calculation (defaults to current date)
             
+        Raises:
+            ValueError: If target_date is invalid
+        """
+        days_in_month = self.resolve_days_in_month(target_date)
+        tree.ensure_arrays()
+        
+        # One vectorized divide over the revenue array, written into the
+        # tree's existing buffer so daily reruns don't allocate. A reciprocal
+        # multiply would be cheaper but is not bit-identical to division.
+        if tree.daily_profit.shape != tree.monthly_revenue.shape:
+            tree.daily_profit = np.empty_like(tree.monthly_revenue)
+        np.divide(tree.monthly_revenue, days_in_month, out=tree.daily_profit)
+    
+    def resolve_days_in_month(self, target_date: Optional[datetime] = None) -> int:
+        """
+        Get the number of days used to spread monthly revenue.
+        
+        Args:
+            target_date: Date for calculation (defaults to current date)
+            
+        Returns:
+            Number of days in the target month
+            
         Raises:
             ValueError: If target_date is invalid
         """
@@ -253,25 +560,16 @@ class DailyProfitCalculator:
             target_date = datetime.now()
         
         self._validate_date(target_date)
-        days_in_month = self._get_days_in_month(target_date)
-        
-        for partner in tree.get_all_partners():
-            partner.daily_profit = MathUtils.safe_divide(
-                partner.monthly_revenue, days_in_month
-            )
+        return self._get_days_in_month(target_date)
     
     def _validate_date(self, target_date: datetime) -> None:
         """Validate that target_date is a proper datetime object."""
         if not isinstance(target_date, datetime):
-            raise ValueError(ErrorMessages.INVALID_INPUT_TYPE.format(
+            raise ValueError(ErrorMessages.invalid_input_type(
                 expected_type="datetime", actual_type=type(target_date).__name__
             ))
     
     def _get_days_in_month(self, target_date: datetime) -> int:
         """Get number of days in the target month."""
-        try:
-            return calendar.monthrange(target_date.year, target_date.month)[1]
-        except ValueError as e:
-            raise ValueError(ErrorMessages.INVALID_DATE.format(
-                date=target_date
-            )) from e
+        # A validated datetime always has a valid year and month
+        return _days_in_month(target_date.year, target_date.month)
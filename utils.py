@@ -3,11 +3,20 @@ Utility functions for file operations and common tasks.
 """
 
 import json
+import mmap
 import tempfile
 import os
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 from pathlib import Path
 
+import numpy as np
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 from config import Constants, ErrorMessages
 
 
@@ -15,36 +24,69 @@ class FileUtils:
     """Utility class for file operations."""
     
     @staticmethod
-    def read_json(filepath: str) -> Any:
+    def read_json(filepath: str, exact_integers: bool = False) -> Any:
         """
         Read JSON data from file with proper error handling.
         
+        Uses orjson to parse the raw bytes when it is installed, falling back
+        to the standard library otherwise. Large files are memory-mapped so
+        orjson parses the page cache directly instead of a copied bytes object.
+        
+        orjson reads integers beyond 64 bits as floats, or rejects them once
+        they overflow a double; the standard library keeps them exact. Input
+        orjson rejects is re-parsed with the standard library, and callers
+        that found a float where an integer belongs can ask for it directly.
+        
         Args:
             filepath: Path to the JSON file
+            exact_integers: Parse with the standard library so integers of
+                any size are kept exactly
             
         Returns:
             Parsed JSON data
             
         Raises:
             FileNotFoundError: If file doesn't exist
-            json.JSONDecodeError: If file contains invalid JSON
+            json.JSONDecodeError: If file contains invalid JSON (orjson's
+                decode error is a subclass and is re-raised as this type)
         """
         try:
+            if ORJSON_AVAILABLE and not exact_integers:
+                try:
+                    return FileUtils._read_json_bytes(filepath)
+                except json.JSONDecodeError:
+                    # Invalid JSON fails again below with the standard error
+                    pass
             with open(filepath, 'r', encoding=Constants.DEFAULT_ENCODING) as f:
                 return json.load(f)
         except FileNotFoundError:
-            raise FileNotFoundError(ErrorMessages.FILE_NOT_FOUND.format(filepath=filepath))
+            raise FileNotFoundError(ErrorMessages.file_not_found(filepath=filepath))
         except json.JSONDecodeError as e:
             raise json.JSONDecodeError(
-                ErrorMessages.INVALID_JSON.format(filepath=filepath),
+                ErrorMessages.invalid_json(filepath=filepath),
                 e.doc, e.pos
             )
     
+    @staticmethod
+    def _read_json_bytes(filepath: str) -> Any:
+        """Parse a JSON file with orjson, memory-mapping it when it is large."""
+        with open(filepath, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < Constants.MMAP_MIN_BYTES:
+                return orjson.loads(f.read())
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # Release the buffer view before the mapping is closed
+                with memoryview(mm) as view:
+                    return orjson.loads(view)
+    
     @staticmethod
     def write_json(filepath: str, data: Any) -> None:
         """
         Write data to JSON file with proper formatting.
         
+        Uses orjson to serialize straight to bytes when it is installed,
+        falling back to the standard library otherwise or when the data holds
+        integers beyond 64 bits, which orjson cannot serialize.
+        
         Args:
             filepath: Path to output file
             data: Data to write
@@ -52,20 +94,62 @@ class FileUtils:
         # Ensure directory exists
         Path(filepath).parent.mkdir(parents=True, exist_ok=True)
         
+        payload = FileUtils._orjson_dumps(data)
+        if payload is not None:
+            Path(filepath).write_bytes(payload)
+            return
+        
         with open(filepath, 'w', encoding=Constants.DEFAULT_ENCODING) as f:
             json.dump(data, f, indent=Constants.JSON_INDENT)
     
+    @staticmethod
+    def write_json_arrays(filepath: str, keys: np.ndarray, values: np.ndarray) -> None:
+        """
+        Write parallel key/value arrays as a JSON object.
+        
+        Produces the same file as ``write_json`` on the equivalent
+        ``{str(key): value}`` dictionary, without the caller having to build it.
+        
+        Args:
+            filepath: Path to output file
+            keys: Object keys (stringified in the output)
+            values: Object values
+        """
+        FileUtils.write_json(filepath, dict(zip(keys.tolist(), values.tolist())))
+    
+    @staticmethod
+    def _orjson_dumps(data: Any) -> Optional[bytes]:
+        """Serialize with orjson, or return None when the stdlib must be used."""
+        if not ORJSON_AVAILABLE:
+            return None
+        try:
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # Integers (or integer keys) beyond 64 bits are rejected by orjson
+            return None
+    
     @staticmethod
     def create_temp_json(data: Any) -> str:
         """
         Create temporary JSON file with data.
         
+        Serializes with orjson in a single write when it is installed,
+        falling back to the standard library otherwise or when the data holds
+        integers beyond 64 bits.
+        
         Args:
             data: Data to write to temp file
             
         Returns:
             Path to temporary file
         """
+        payload = FileUtils._orjson_dumps(data)
+        if payload is not None:
+            fd, path = tempfile.mkstemp(suffix='.json')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+            return path
+        
         with tempfile.NamedTemporaryFile(
             mode='w', 
             suffix='.json', 
@@ -88,29 +172,39 @@ class ValidationUtils:
             data: List of partner dictionaries
             
         Raises:
-            ValueError: If data structure is invalid
+            ValueError: If data structure is invalid or a partner ID repeats
         """
         if not isinstance(data, list):
-            raise ValueError(ErrorMessages.INVALID_INPUT_TYPE.format(
+            raise ValueError(ErrorMessages.invalid_input_type(
                 expected_type="list", actual_type=type(data).__name__
             ))
         
-        required_fields = {'id', 'monthly_revenue'}
+        # Membership tests on each dict avoid building a key set per partner;
+        # the set of missing fields and every message are only built on failure
+        seen_ids = set()
         
         for i, item in enumerate(data):
             if not isinstance(item, dict):
-                raise ValueError(f"Partner data at index {i} must be a dictionary")
+                raise ValueError(ErrorMessages.partner_not_dict(index=i))
             
-            missing_fields = required_fields - set(item.keys())
-            if missing_fields:
-                raise ValueError(f"Partner at index {i} missing required fields: {missing_fields}")
+            if 'id' not in item or 'monthly_revenue' not in item:
+                missing_fields = {'id', 'monthly_revenue'} - item.keys()
+                raise ValueError(ErrorMessages.missing_fields(index=i, fields=missing_fields))
             
             # Validate data types
-            if not isinstance(item['id'], int):
-                raise ValueError(f"Partner ID at index {i} must be integer")
+            partner_id = item['id']
+            if not isinstance(partner_id, int):
+                raise ValueError(ErrorMessages.invalid_partner_id(index=i))
             
             if not isinstance(item['monthly_revenue'], (int, float)):
-                raise ValueError(f"Monthly revenue at index {i} must be numeric")
+                raise ValueError(ErrorMessages.invalid_revenue(index=i))
+            
+            # A repeated ID would silently replace the earlier partner
+            if partner_id in seen_ids:
+                raise ValueError(ErrorMessages.duplicate_partner_id(
+                    partner_id=partner_id, index=i
+                ))
+            seen_ids.add(partner_id)
 
 
 class MathUtils:
@@ -144,3 +238,34 @@ class MathUtils:
             Rounded value
         """
         return round(value, decimal_places)
+    
+    @staticmethod
+    def round_currency_array(values: np.ndarray, decimal_places: int = 2) -> np.ndarray:
+        """
+        Round an array of currency values in one vectorized pass.
+        
+        ``np.round`` scales by a power of ten before rounding, which can land
+        on the other side of a half-way point than Python's correctly rounded
+        ``round``. The few elements sitting on such a tie are re-rounded with
+        ``round_currency`` so results match the scalar API exactly.
+        
+        Args:
+            values: Values to round
+            decimal_places: Number of decimal places
+            
+        Returns:
+            New array of rounded values
+        """
+        rounded = np.round(values, decimal_places)
+        
+        # Distance of each scaled value from a half-way point, computed in place
+        scaled = values * (10.0 ** decimal_places)
+        fraction = np.floor(scaled)
+        np.subtract(scaled, fraction, out=fraction)
+        fraction -= 0.5
+        np.abs(fraction, out=fraction)
+        near_tie = fraction < Constants.ROUNDING_TIE_TOLERANCE
+        for i in np.flatnonzero(near_tie).tolist():
+            rounded[i] = MathUtils.round_currency(float(values[i]), decimal_places)
+        
+        return rounded